@@ -2,8 +2,24 @@
 AI service adapters for translation and content optimization.
 """
 
-from .openai import OpenAIAdapter
-from .claude import ClaudeAdapter
+import importlib
+
+# Adapter classes resolve on first access so loading one adapter module
+# does not import the others (and their HTTP/SDK dependencies).
+_ADAPTER_MODULES = {
+    "OpenAIAdapter": "openai",
+    "ClaudeAdapter": "claude",
+}
+
+
+def __getattr__(name):
+    module_name = _ADAPTER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "OpenAIAdapter",
@@ -2,8 +2,24 @@
 Source platform adapters for content acquisition.
 """
 
-from .medium import MediumAdapter
-from .devto import DevToAdapter
+import importlib
+
+# Adapter classes resolve on first access so loading one adapter module
+# does not import the others (and their HTTP/SDK dependencies).
+_ADAPTER_MODULES = {
+    "MediumAdapter": "medium",
+    "DevToAdapter": "devto",
+}
+
+
+def __getattr__(name):
+    module_name = _ADAPTER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "MediumAdapter",
@@ -224,6 +224,7 @@ async def create_processing_rule(
         db.add(new_rule)
         db.commit()
         db.refresh(new_rule)
+        get_processing_config_service().invalidate_rules_cache()
         
         return ProcessingRuleResponse(
             id=new_rule.id,
@@ -363,6 +364,7 @@ async def update_processing_rule(
 
         db.commit()
         db.refresh(rule)
+        get_processing_config_service().invalidate_rules_cache()
 
         return ProcessingRuleResponse(
             id=rule.id,
@@ -415,6 +417,7 @@ async def delete_processing_rule(
 
         db.delete(rule)
         db.commit()
+        get_processing_config_service().invalidate_rules_cache()
 
         return {"message": "Processing rule deleted successfully"}
 
@@ -361,6 +361,17 @@ def migrate_database(conn):
         # Update display_name for existing records if empty
         cursor.execute("UPDATE prompt_templates SET display_name = name WHERE display_name = '' OR display_name IS NULL")
 
+        # Add indexes for dashboard status/date predicates
+        dashboard_indexes = [
+            ('idx_articles_status_created', 'articles(status, created_at DESC)'),
+            ('idx_articles_created_status', 'articles(created_at DESC, status)'),
+            ('idx_tasks_status_created', 'tasks(status, created_at DESC)'),
+            ('idx_detection_type_time', 'detection_results(detection_type, detected_at)')
+        ]
+
+        for index_name, index_def in dashboard_indexes:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {index_def}")
+
         logger.info("Database migration completed successfully")
 
     except Exception as e:
@@ -148,10 +148,30 @@ async def startup_event():
         
         logger.info("Platform manager initialized successfully")
         
+        # Keep the LLM connection pool open for the lifetime of the app
+        from .services.llm_api import startup_llm_service
+        app.state.llm = await startup_llm_service()
+        
     except Exception as e:
         logger.error(f"Failed to initialize services: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release long-lived service resources on shutdown."""
+    try:
+        from .services.enhanced_proxy_manager import shutdown_enhanced_proxy_manager
+        await shutdown_enhanced_proxy_manager()
+    except Exception as e:
+        logger.error(f"Failed to shut down services: {e}")
+    
+    try:
+        from .services.llm_api import shutdown_llm_service
+        await shutdown_llm_service()
+    except Exception as e:
+        logger.error(f"Failed to shut down services: {e}")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Serve the main application page."""
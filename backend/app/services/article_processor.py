@@ -657,8 +657,8 @@ class ArticleProcessor:
                 translated_length = len(result.content)
 
                 # 使用传统关键词分类方法
-                from .processing_config_service import ProcessingConfigService
-                config_service = ProcessingConfigService()
+                from .processing_config_service import get_processing_config_service
+                config_service = get_processing_config_service()
                 category, confidence = config_service.classify_article(article)
 
                 article.category = category.value
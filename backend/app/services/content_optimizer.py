@@ -7,11 +7,99 @@ Optimizes article content for publishing on Chinese platforms.
 import logging
 import re
 import asyncio
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Optimization rule sets per level
+_RULE_SETS = {
+    "basic": ("format_cleanup",),
+    "standard": ("format_cleanup", "paragraph_optimization", "tag_generation"),
+    "advanced": ("format_cleanup", "title_optimization", "paragraph_optimization",
+                 "tag_generation", "seo_optimization", "platform_adaptation")
+}
+
+_RULE_NAMES = frozenset(_RULE_SETS["advanced"])
+
+# Whitespace-delimited token, used for word counts without splitting
+_RE_WORD = re.compile(r'\S+')
+
+# Characters that already make a title stand out on toutiao
+_TITLE_EMPHASIS_CHARS = frozenset("！？【】")
+
+# Toutiao title topic; AI keywords take priority over general tech ones
+_TOUTIAO_TITLE_RE = re.compile(r'(?=.*?(?P<ai>AI|人工智能))|(?=.*?(?P<tech>技术|开发))', re.S)
+_TOUTIAO_TITLE_TAGS = {"ai": "【AI前沿】", "tech": "【技术分享】"}
+
+# Zhihu titles already phrased as a question
+_ZHIHU_QUESTION_RE = re.compile(r'如何|什么')
+
+# Closing lines appended per platform by _adapt_for_platform
+_PLATFORM_SUFFIX = {
+    "toutiao": "\n\n你对这个话题有什么看法？欢迎在评论区分享你的观点！",
+    "weixin": "\n\n---\n如果觉得这篇文章对你有帮助，请点赞并关注我们，获取更多优质内容！",
+    "zhihu": "\n\n---\n以上内容仅代表个人观点，欢迎理性讨论。"
+}
+
+
+class _ContentParts:
+    """
+    Article body plus pending prefix/suffix sections.
+    
+    Decoration rules only prepend or append "\n\n"-delimited sections, so
+    they are collected here and joined once instead of copying the whole
+    article after every rule.
+    """
+    
+    __slots__ = ("body", "prefixes", "suffixes")
+    
+    def __init__(self, body: str):
+        self.body = body
+        self.prefixes: List[str] = []  # innermost first
+        self.suffixes: List[str] = []
+    
+    def parts(self) -> List[str]:
+        return self.prefixes[::-1] + [self.body] + self.suffixes
+    
+    def text(self) -> str:
+        if not self.prefixes and not self.suffixes:
+            return self.body
+        return ''.join(self.parts())
+    
+    def lower(self) -> "_ContentParts":
+        lowered = _ContentParts(self.body.lower())
+        lowered.prefixes = [part.lower() for part in self.prefixes]
+        lowered.suffixes = [part.lower() for part in self.suffixes]
+        return lowered
+    
+    def paragraphs(self) -> Iterator[str]:
+        for part in self.parts():
+            yield from part.split('\n\n')
+    
+    def __len__(self) -> int:
+        return sum(map(len, self.parts()))
+    
+    def __contains__(self, needle: str) -> bool:
+        parts = self.parts()
+        if any(needle in part for part in parts):
+            return True
+        # Matches spanning a section boundary
+        overlap = len(needle) - 1
+        return overlap > 0 and any(
+            needle in left[-overlap:] + right[:overlap]
+            for left, right in zip(parts, parts[1:])
+        )
+    
+    def startswith(self, prefix: str) -> bool:
+        head = self.prefixes[-1] if self.prefixes else self.body
+        return head.startswith(prefix) if len(head) >= len(prefix) else self.text().startswith(prefix)
+    
+    def endswith(self, suffix: str) -> bool:
+        tail = self.suffixes[-1] if self.suffixes else self.body
+        return tail.endswith(suffix) if len(tail) >= len(suffix) else self.text().endswith(suffix)
+
 
 class OptimizationResult:
     """Result of content optimization."""
@@ -37,6 +125,14 @@ class ContentOptimizer:
             'seo_optimization': self._seo_optimization,
             'platform_adaptation': self._adapt_for_platform
         }
+        # Rules that only add a section before/after the content
+        self.prefix_rules = {
+            'seo_optimization': self._seo_summary
+        }
+        self.suffix_rules = {
+            'tag_generation': self._tags_section,
+            'platform_adaptation': self._platform_footer
+        }
     
     async def optimize_content(
         self,
@@ -68,7 +164,7 @@ class ContentOptimizer:
             # Determine optimization rules to apply
             rules_to_apply = self._get_optimization_rules(optimization_level, custom_rules)
             
-            optimized_content = content
+            content_parts = _ContentParts(content)
             optimized_title = title
             metadata = {
                 "original_length": len(content),
@@ -83,16 +179,28 @@ class ContentOptimizer:
                     self.logger.debug(f"Applying optimization rule: {rule_name}")
                     
                     if rule_name == 'title_optimization':
-                        optimized_title = await self.optimization_rules[rule_name](optimized_title, platform)
+                        optimized_title = self.optimization_rules[rule_name](optimized_title, platform)
+                    elif rule_name in self.prefix_rules:
+                        section = self.prefix_rules[rule_name](content_parts, platform)
+                        if section:
+                            content_parts.prefixes.append(section)
+                    elif rule_name in self.suffix_rules:
+                        section = self.suffix_rules[rule_name](content_parts, platform)
+                        if section:
+                            content_parts.suffixes.append(section)
                     else:
-                        optimized_content = await self.optimization_rules[rule_name](optimized_content, platform)
+                        content_parts = _ContentParts(
+                            self.optimization_rules[rule_name](content_parts.text(), platform)
+                        )
+            
+            optimized_content = content_parts.text()
             
             # Generate final metadata
             metadata.update({
                 "optimized_length": len(optimized_content),
                 "title_optimized": optimized_title != title,
                 "compression_ratio": len(optimized_content) / len(content) if content else 1.0,
-                "word_count": len(optimized_content.split()),
+                "word_count": sum(1 for _ in _RE_WORD.finditer(optimized_content)),
                 "estimated_reading_time": self._calculate_reading_time(optimized_content)
             })
             
@@ -116,25 +224,22 @@ class ContentOptimizer:
     
     def _get_optimization_rules(self, level: str, custom_rules: List[str] = None) -> List[str]:
         """Get optimization rules based on level and custom rules."""
+        return list(self._rules_cached(level, tuple(custom_rules or ())))
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _rules_cached(level: str, custom: Tuple[str, ...]) -> Tuple[str, ...]:
+        """Resolve the rule list for a (level, custom rules) pair once."""
+        rules = _RULE_SETS.get(level, _RULE_SETS["standard"])
         
-        rule_sets = {
-            "basic": ["format_cleanup"],
-            "standard": ["format_cleanup", "paragraph_optimization", "tag_generation"],
-            "advanced": ["format_cleanup", "title_optimization", "paragraph_optimization", 
-                        "tag_generation", "seo_optimization", "platform_adaptation"]
-        }
-        
-        rules = rule_sets.get(level, rule_sets["standard"])
-        
-        if custom_rules:
-            # Add custom rules if they exist in our optimization_rules
-            for rule in custom_rules:
-                if rule in self.optimization_rules and rule not in rules:
-                    rules.append(rule)
+        # Add custom rules if they exist in our optimization_rules
+        extra = tuple(dict.fromkeys(
+            rule for rule in custom if rule in _RULE_NAMES and rule not in rules
+        ))
         
-        return rules
+        return rules + extra
     
-    async def _format_cleanup(self, content: str, platform: str) -> str:
+    def _format_cleanup(self, content: str, platform: str) -> str:
         """Clean up content formatting."""
         # Remove excessive whitespace
         content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
@@ -150,7 +255,7 @@ class ContentOptimizer:
         
         return content.strip()
     
-    async def _optimize_title(self, title: str, platform: str) -> str:
+    def _optimize_title(self, title: str, platform: str) -> str:
         """Optimize title for Chinese platforms."""
         if not title:
             return title
@@ -158,12 +263,11 @@ class ContentOptimizer:
         # Platform-specific title optimization
         if platform == "toutiao":
             # 今日头条喜欢有吸引力的标题
-            if not any(char in title for char in "！？【】"):
+            if _TITLE_EMPHASIS_CHARS.isdisjoint(title):
                 # Add emphasis if not already present
-                if "AI" in title or "人工智能" in title:
-                    title = f"【AI前沿】{title}"
-                elif "技术" in title or "开发" in title:
-                    title = f"【技术分享】{title}"
+                match = _TOUTIAO_TITLE_RE.match(title)
+                if match:
+                    title = _TOUTIAO_TITLE_TAGS[match.lastgroup] + title
         
         elif platform == "weixin":
             # 微信公众号标题优化
@@ -172,13 +276,13 @@ class ContentOptimizer:
         
         elif platform == "zhihu":
             # 知乎标题优化，更学术化
-            if not title.endswith("？") and "如何" not in title and "什么" not in title:
+            if not title.endswith("？") and not _ZHIHU_QUESTION_RE.search(title):
                 if "AI" in title:
                     title = f"如何理解{title}？"
         
         return title
     
-    async def _optimize_paragraphs(self, content: str, platform: str) -> str:
+    def _optimize_paragraphs(self, content: str, platform: str) -> str:
         """Optimize paragraph structure for readability."""
         paragraphs = content.split('\n\n')
         optimized_paragraphs = []
@@ -213,8 +317,12 @@ class ContentOptimizer:
         
         return '\n\n'.join(optimized_paragraphs)
     
-    async def _generate_tags(self, content: str, platform: str) -> str:
+    def _generate_tags(self, content: str, platform: str) -> str:
         """Generate relevant tags for the content."""
+        return content + self._tags_section(_ContentParts(content), platform)
+    
+    def _tags_section(self, content: _ContentParts, platform: str) -> str:
+        """Build the tags section appended by tag generation."""
         # Extract potential tags from content
         tech_keywords = [
             "AI", "人工智能", "机器学习", "深度学习", "神经网络",
@@ -233,13 +341,16 @@ class ContentOptimizer:
                     break
         
         if found_tags:
-            tags_section = f"\n\n---\n标签: {' '.join([f'#{tag}' for tag in found_tags])}"
-            return content + tags_section
+            return f"\n\n---\n标签: {' '.join([f'#{tag}' for tag in found_tags])}"
         
-        return content
+        return ""
     
-    async def _seo_optimization(self, content: str, platform: str) -> str:
+    def _seo_optimization(self, content: str, platform: str) -> str:
         """Apply SEO optimization for better discoverability."""
+        return self._seo_summary(_ContentParts(content), platform) + content
+    
+    def _seo_summary(self, content: _ContentParts, platform: str) -> str:
+        """Build the summary section prepended by SEO optimization."""
         # Add keyword density optimization
         # Add internal linking suggestions
         # Add meta description equivalent
@@ -247,36 +358,38 @@ class ContentOptimizer:
         # For now, just add a summary at the beginning for long articles
         if len(content) > 1000:
             # Extract first meaningful paragraph as summary
-            paragraphs = content.split('\n\n')
-            first_para = next((p for p in paragraphs if len(p.strip()) > 50), "")
+            first_para = next((p for p in content.paragraphs() if len(p.strip()) > 50), "")
             
             if first_para and not content.startswith("摘要"):
-                summary = f"**摘要**: {first_para[:100]}...\n\n"
-                return summary + content
+                return f"**摘要**: {first_para[:100]}...\n\n"
         
-        return content
+        return ""
     
-    async def _adapt_for_platform(self, content: str, platform: str) -> str:
+    def _adapt_for_platform(self, content: str, platform: str) -> str:
         """Adapt content for specific platform requirements."""
+        return content + self._platform_footer(_ContentParts(content), platform)
+    
+    def _platform_footer(self, content: _ContentParts, platform: str) -> str:
+        """Build the platform-specific footer appended by platform adaptation."""
         
         if platform == "toutiao":
             # 今日头条适配
             # 添加互动元素
             if not content.endswith("你怎么看？"):
-                content += "\n\n你对这个话题有什么看法？欢迎在评论区分享你的观点！"
+                return _PLATFORM_SUFFIX["toutiao"]
         
         elif platform == "weixin":
             # 微信公众号适配
             # 添加关注提醒
             if "关注" not in content:
-                content += "\n\n---\n如果觉得这篇文章对你有帮助，请点赞并关注我们，获取更多优质内容！"
+                return _PLATFORM_SUFFIX["weixin"]
         
         elif platform == "zhihu":
             # 知乎适配
             # 添加专业性声明
-            content += "\n\n---\n以上内容仅代表个人观点，欢迎理性讨论。"
+            return _PLATFORM_SUFFIX["zhihu"]
         
-        return content
+        return ""
     
     def _calculate_reading_time(self, content: str) -> int:
         """Calculate estimated reading time in minutes."""
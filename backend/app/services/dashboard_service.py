@@ -2,16 +2,42 @@
 Dashboard service for real-time statistics and monitoring.
 """
 
+import sys
 import logging
 import asyncio
+import time
+import sqlite3
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 from ..core.database import get_db_connection
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Slotted dataclasses need Python 3.10+; fall back to regular ones on 3.9
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Rows pulled from SQLite per fetchmany() call
+_FETCH_BATCH_SIZE = 50
+
+
+def _iter_rows(cursor: sqlite3.Cursor) -> Iterator[sqlite3.Row]:
+    """Stream rows from a cursor in fetchmany() batches."""
+    while True:
+        rows = cursor.fetchmany(_FETCH_BATCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+@lru_cache(maxsize=512)
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a stored timestamp; polls mostly see the same rows, so cache."""
+    return datetime.fromisoformat(value)
+
+@dataclass(**_DATACLASS_OPTIONS)
 class TaskInfo:
     """Task information for monitoring."""
     task_id: str
@@ -23,7 +49,7 @@ class TaskInfo:
     started_at: datetime
     estimated_completion: Optional[datetime] = None
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ActivityInfo:
     """Recent activity information."""
     id: int
@@ -37,80 +63,115 @@ class ActivityInfo:
 class DashboardService:
     """Service for dashboard data and real-time monitoring."""
     
+    # Cache lifetimes (seconds) for frequently polled dashboard data
+    STATS_CACHE_TTL = 2.0
+    ACTIVE_TASKS_CACHE_TTL = 1.0
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self._active_tasks = {}
         self._recent_activities = []
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._inflight_stats: Optional[asyncio.Future] = None
+        self._tasks_cache: Optional[Tuple[float, List[TaskInfo]]] = None
+        self._inflight_tasks: Optional[asyncio.Future] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get the persistent dashboard connection (call with _conn_lock held)."""
+        if self._conn is None:
+            self._conn = get_db_connection()
+            self._conn.row_factory = sqlite3.Row
+            # Larger page cache for the repeated aggregate queries
+            self._conn.execute("PRAGMA cache_size=-20000")
+        return self._conn
         
     async def get_real_time_statistics(self) -> Dict[str, Any]:
         """Get real-time dashboard statistics."""
+        cached = self._stats_cache
+        if cached and time.monotonic() - cached[0] < self.STATS_CACHE_TTL:
+            return dict(cached[1])
+        
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Get today's date
-            today = datetime.now().strftime('%Y-%m-%d')
+            # Concurrent callers share a single in-flight refresh
+            if self._inflight_stats is None:
+                self._inflight_stats = asyncio.ensure_future(self._refresh_real_time_statistics())
+            stats = await asyncio.shield(self._inflight_stats)
+            return dict(stats)
             
-            # Total articles
-            cursor.execute("SELECT COUNT(*) FROM articles")
-            total_articles = cursor.fetchone()[0]
-            
-            # Processed today
-            cursor.execute("""
-                SELECT COUNT(*) FROM articles 
-                WHERE DATE(created_at) = ? AND status IN ('completed', 'published')
-            """, (today,))
-            processed_today = cursor.fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Failed to get real-time statistics: {e}")
+            # Return default values on error
+            return {
+                "total_articles": 0,
+                "processed_today": 0,
+                "success_rate": 0.0,
+                "active_tasks": 0,
+                "ai_detection_rate": 0.0,
+                "avg_processing_time_minutes": 0.0,
+                "last_updated": datetime.now().isoformat()
+            }
+    
+    async def _refresh_real_time_statistics(self) -> Dict[str, Any]:
+        """Fetch statistics off the event loop and update the cache."""
+        try:
+            stats = await asyncio.to_thread(self._fetch_real_time_statistics)
+            self._stats_cache = (time.monotonic(), stats)
+            return stats
+        finally:
+            self._inflight_stats = None
+    
+    def _fetch_real_time_statistics(self) -> Dict[str, Any]:
+        """Query real-time dashboard statistics from the database."""
+        with self._conn_lock:
+            cursor = self._get_connection().cursor()
             
-            # Success rate (last 100 articles)
+            # Article totals, today's output and success rate (last 100 articles)
             cursor.execute("""
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'completed' OR status = 'published' THEN 1 ELSE 0 END) as successful
-                FROM (
-                    SELECT status FROM articles 
-                    ORDER BY created_at DESC 
+                WITH recent AS (
+                    SELECT status FROM articles
+                    ORDER BY created_at DESC
                     LIMIT 100
                 )
+                SELECT
+                    COUNT(*) as total,
+                    SUM(CASE WHEN DATE(created_at) = DATE('now', 'localtime') AND status IN ('completed', 'published') THEN 1 ELSE 0 END) as processed_today,
+                    (SELECT COUNT(*) FROM recent) as recent_total,
+                    (SELECT SUM(CASE WHEN status IN ('completed', 'published') THEN 1 ELSE 0 END) FROM recent) as recent_successful
+                FROM articles
             """)
             result = cursor.fetchone()
-            total_recent = result[0] if result[0] > 0 else 1
-            successful_recent = result[1] if result[1] else 0
+            total_articles = result[0]
+            processed_today = result[1] or 0
+            total_recent = result[2] if result[2] > 0 else 1
+            successful_recent = result[3] if result[3] else 0
             success_rate = (successful_recent / total_recent) * 100
             
-            # Active tasks
+            # Active tasks, average processing time and AI detection rate
             cursor.execute("""
-                SELECT COUNT(*) FROM tasks 
-                WHERE status IN ('pending', 'running')
-            """)
-            active_tasks = cursor.fetchone()[0]
-            
-            # AI detection rate from actual detection results
-            cursor.execute("""
-                SELECT AVG(score) FROM detection_results
-                WHERE detection_type = 'ai_detection'
-                AND detected_at >= datetime('now', '-7 days')
+                SELECT
+                    SUM(CASE WHEN status IN ('pending', 'running') THEN 1 ELSE 0 END) as active,
+                    AVG(
+                        CASE
+                            WHEN status = 'completed'
+                                AND created_at >= datetime('now', '-7 days')
+                                AND completed_at IS NOT NULL AND created_at IS NOT NULL
+                            THEN (julianday(completed_at) - julianday(created_at)) * 24 * 60
+                            ELSE NULL
+                        END
+                    ) as avg_minutes,
+                    (
+                        SELECT AVG(score) FROM detection_results
+                        WHERE detection_type = 'ai_detection'
+                        AND detected_at >= datetime('now', '-7 days')
+                    ) as ai_detection_rate
+                FROM tasks
             """)
             result = cursor.fetchone()
-            ai_detection_rate = result[0] if result[0] else 0.0
-            
-            # Average processing time
-            cursor.execute("""
-                SELECT AVG(
-                    CASE 
-                        WHEN completed_at IS NOT NULL AND created_at IS NOT NULL 
-                        THEN (julianday(completed_at) - julianday(created_at)) * 24 * 60 
-                        ELSE NULL 
-                    END
-                ) as avg_minutes
-                FROM tasks 
-                WHERE status = 'completed' 
-                AND created_at >= datetime('now', '-7 days')
-            """)
-            result = cursor.fetchone()
-            avg_processing_time = result[0] if result[0] else 0
-            
-            conn.close()
+            active_tasks = result[0] or 0
+            avg_processing_time = result[1] if result[1] else 0
+            ai_detection_rate = result[2] if result[2] else 0.0
             
             return {
                 "total_articles": total_articles,
@@ -121,25 +182,36 @@ class DashboardService:
                 "avg_processing_time_minutes": round(avg_processing_time, 1) if avg_processing_time else 0,
                 "last_updated": datetime.now().isoformat()
             }
-            
-        except Exception as e:
-            self.logger.error(f"Failed to get real-time statistics: {e}")
-            # Return default values on error
-            return {
-                "total_articles": 0,
-                "processed_today": 0,
-                "success_rate": 0.0,
-                "active_tasks": 0,
-                "ai_detection_rate": 0.0,
-                "avg_processing_time_minutes": 0.0,
-                "last_updated": datetime.now().isoformat()
-            }
     
     async def get_active_tasks(self) -> List[TaskInfo]:
         """Get currently active tasks for monitoring."""
+        cached = self._tasks_cache
+        if cached and time.monotonic() - cached[0] < self.ACTIVE_TASKS_CACHE_TTL:
+            return list(cached[1])
+        
+        try:
+            if self._inflight_tasks is None:
+                self._inflight_tasks = asyncio.ensure_future(self._refresh_active_tasks())
+            tasks = await asyncio.shield(self._inflight_tasks)
+            return list(tasks)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get active tasks: {e}")
+            return []
+    
+    async def _refresh_active_tasks(self) -> List[TaskInfo]:
+        """Fetch active tasks off the event loop and update the cache."""
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
+            tasks = await asyncio.to_thread(self._fetch_active_tasks)
+            self._tasks_cache = (time.monotonic(), tasks)
+            return tasks
+        finally:
+            self._inflight_tasks = None
+    
+    def _fetch_active_tasks(self) -> List[TaskInfo]:
+        """Query currently active tasks from the database."""
+        with self._conn_lock:
+            cursor = self._get_connection().cursor()
             
             cursor.execute("""
                 SELECT 
@@ -157,31 +229,32 @@ class DashboardService:
                 LIMIT 10
             """)
             
-            tasks = []
-            for row in cursor.fetchall():
-                task_info = TaskInfo(
-                    task_id=row[0],
-                    article_id=row[1],
-                    title=row[2],
-                    status=row[3],
-                    progress=float(row[4]),
-                    current_step=row[5],
-                    started_at=datetime.fromisoformat(row[6]) if row[6] else datetime.now()
+            return [
+                TaskInfo(
+                    task_id=row['task_id'],
+                    article_id=row['article_id'],
+                    title=row['title'],
+                    status=row['status'],
+                    progress=float(row['progress']),
+                    current_step=row['current_step'],
+                    started_at=_parse_timestamp(row['created_at']) if row['created_at'] else datetime.now()
                 )
-                tasks.append(task_info)
-            
-            conn.close()
-            return tasks
-            
-        except Exception as e:
-            self.logger.error(f"Failed to get active tasks: {e}")
-            return []
+                for row in _iter_rows(cursor)
+            ]
     
     async def get_recent_activities(self, limit: int = 20) -> List[ActivityInfo]:
         """Get recent system activities."""
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
+            return await asyncio.to_thread(self._fetch_recent_activities, limit)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get recent activities: {e}")
+            return []
+    
+    def _fetch_recent_activities(self, limit: int) -> List[ActivityInfo]:
+        """Query recent system activities from the database."""
+        with self._conn_lock:
+            cursor = self._get_connection().cursor()
             
             # Get recent articles
             cursor.execute("""
@@ -198,31 +271,24 @@ class DashboardService:
                 LIMIT ?
             """, (limit,))
             
-            activities = []
-            for row in cursor.fetchall():
-                activity = ActivityInfo(
-                    id=row[0],
+            activities = [
+                ActivityInfo(
+                    id=row['id'],
                     type='article_processed',
-                    title=row[2] or 'Unknown Article',
-                    description=f"从 {row[6]} 处理文章",
-                    timestamp=datetime.fromisoformat(row[4]) if row[4] else datetime.now(),
-                    status=row[3],
+                    title=row['title'] or 'Unknown Article',
+                    description=f"从 {row['source_platform']} 处理文章",
+                    timestamp=_parse_timestamp(row['created_at']) if row['created_at'] else datetime.now(),
+                    status=row['status'],
                     metadata={
-                        "source_url": row[5],
-                        "source_platform": row[6]
+                        "source_url": row['source_url'],
+                        "source_platform": row['source_platform']
                     }
                 )
-                activities.append(activity)
-            
-            conn.close()
+                for row in _iter_rows(cursor)
+            ]
             
-            # Sort by timestamp
-            activities.sort(key=lambda x: x.timestamp, reverse=True)
-            return activities[:limit]
-            
-        except Exception as e:
-            self.logger.error(f"Failed to get recent activities: {e}")
-            return []
+            # Already newest-first and limited by the query
+            return activities
 
 # Global instance
 _dashboard_service = None
@@ -5,185 +5,302 @@
 """
 
 import asyncio
+import atexit
+import json
 import logging
 import platform
+import random
 import subprocess
-import winreg
+import threading
+import time
+from collections import deque
+from contextlib import AsyncExitStack
 import aiohttp
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+if ORJSON_AVAILABLE:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 class EnhancedClashAPI:
     """增强版Clash API管理器"""
     
     def __init__(self, controller_uri: str = "http://127.0.0.1:9090", secret: str = ""):
-        self.base_url = controller_uri
+        self.base_url = controller_uri.rstrip('/')
+        self._proxies_url = f"{self.base_url}/proxies"
         self.headers = {'Content-Type': 'application/json'}
         if secret:
             self.headers['Authorization'] = f'Bearer {secret}'
-        self.logger = logging.getLogger(__name__)
+        self._session: Optional[aiohttp.ClientSession] = None
+        # /proxies 响应缓存: (获取时间, 代理数据)
+        self._proxies_cache: Optional[Tuple[float, Dict]] = None
+        self._proxies_ttl = 1.0
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取复用的HTTP会话（懒加载）"""
+        if self._session is None or self._session.closed:
+            # 控制器为本地明文HTTP：保持少量长连接，缓存DNS，不需要SSL
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=5),
+                connector=aiohttp.TCPConnector(
+                    limit=20,
+                    limit_per_host=4,
+                    keepalive_timeout=60,
+                    force_close=False,
+                    use_dns_cache=True,
+                    ttl_dns_cache=300,
+                    ssl=False
+                )
+            )
+        return self._session
+    
+    async def aclose(self):
+        """关闭HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def invalidate(self):
+        """使/proxies缓存失效"""
+        self._proxies_cache = None
     
     async def get_proxies(self) -> Optional[Dict]:
-        """获取所有代理和策略组信息"""
+        """获取所有代理和策略组信息（短时缓存）"""
+        cached = self._proxies_cache
+        if cached and time.monotonic() - cached[0] < self._proxies_ttl:
+            return cached[1]
+        
         try:
-            timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(f"{self.base_url}/proxies", headers=self.headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('proxies', {})
-                    else:
-                        self.logger.error(f"❌ Clash API响应错误: HTTP {response.status}")
-                        return None
+            session = await self._get_session()
+            async with session.get(self._proxies_url) as response:
+                if response.status == 200:
+                    # 直接解析原始字节，跳过aiohttp的content-type检查
+                    data = _json_loads(await response.read())
+                    proxies = data.get('proxies', {})
+                    self._proxies_cache = (time.monotonic(), proxies)
+                    return proxies
+                else:
+                    logger.error("❌ Clash API响应错误: HTTP %s", response.status)
+                    return None
         except Exception as e:
-            self.logger.error(f"❌ 无法连接到Clash API: {e}")
+            logger.error("❌ 无法连接到Clash API: %s", e)
             return None
     
     async def switch_proxy(self, selector_name: str, proxy_name: str) -> bool:
         """切换指定策略组的代理节点"""
         try:
-            url = f"{self.base_url}/proxies/{selector_name}"
-            payload = {"name": proxy_name}
+            url = f"{self._proxies_url}/{selector_name}"
+            payload = _json_dumps({"name": proxy_name})
             
-            timeout = aiohttp.ClientTimeout(total=5)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.put(url, headers=self.headers, json=payload) as response:
-                    if response.status == 204:
-                        self.logger.info(f"✅ 成功切换: {selector_name} -> {proxy_name}")
-                        return True
-                    else:
-                        self.logger.error(f"❌ 切换失败: HTTP {response.status}")
-                        return False
+            session = await self._get_session()
+            async with session.put(url, data=payload) as response:
+                # 切换会改变策略组状态
+                self.invalidate()
+                if response.status == 204:
+                    logger.info("✅ 成功切换: %s -> %s", selector_name, proxy_name)
+                    return True
+                else:
+                    logger.error("❌ 切换失败: HTTP %s", response.status)
+                    return False
         except Exception as e:
-            self.logger.error(f"❌ 切换代理失败: {e}")
+            logger.error("❌ 切换代理失败: %s", e)
             return False
     
-    async def get_selector_groups(self) -> Dict[str, Dict]:
-        """获取所有Selector策略组"""
-        proxies = await self.get_proxies()
+    async def get_selector_groups(self, proxies: Optional[Dict] = None) -> Dict[str, Dict]:
+        """获取所有Selector策略组，可复用已获取的代理数据"""
+        if proxies is None:
+            proxies = await self.get_proxies()
         if not proxies:
             return {}
         
-        selectors = {}
-        for name, data in proxies.items():
-            if data.get('type') == 'Selector':
-                selectors[name] = {
-                    'name': name,
-                    'current': data.get('now', ''),
-                    'all': data.get('all', []),
-                    'type': data.get('type', '')
-                }
-        
-        return selectors
-    
-    async def get_available_nodes(self, selector_name: str) -> List[str]:
-        """获取指定策略组的可用节点"""
-        proxies = await self.get_proxies()
+        return {
+            name: {
+                'name': name,
+                'current': data.get('now', ''),
+                'all': data.get('all', []),
+                'type': proxy_type
+            }
+            for name, data in proxies.items()
+            if (proxy_type := data.get('type')) == 'Selector'
+        }
+    
+    async def get_available_nodes(self, selector_name: str, proxies: Optional[Dict] = None) -> List[str]:
+        """获取指定策略组的可用节点，可复用已获取的代理数据"""
+        if proxies is None:
+            proxies = await self.get_proxies()
         if not proxies or selector_name not in proxies:
             return []
         
         return proxies[selector_name].get('all', [])
 
+# Windows Internet设置相关常量
+_WINDOWS_INTERNET_SETTINGS = r'Software\Microsoft\Windows\CurrentVersion\Internet Settings'
+_HWND_BROADCAST = 0xFFFF
+_WM_SETTINGCHANGE = 0x001A
+_SMTO_ABORTIFHUNG = 0x0002
+_SETTINGCHANGE_TIMEOUT_MS = 200
+_INTERNET_OPTION_SETTINGS_CHANGED = 39
+_INTERNET_OPTION_REFRESH = 37
+
+
+def _load_windows_api() -> Tuple:
+    """加载Windows注册表模块与所需的Win32函数（仅Windows）"""
+    import ctypes
+    import winreg
+    
+    send_message = ctypes.WinDLL('user32', use_last_error=True).SendMessageTimeoutW
+    internet_set_option = ctypes.WinDLL('wininet', use_last_error=True).InternetSetOptionW
+    return winreg, send_message, internet_set_option
+
+
+def _apply_windows_proxy(windows_api: Tuple, enable: bool, server: Optional[str]):
+    """一次性写入Windows代理注册表并通知系统（同步，在线程池中执行）"""
+    import ctypes
+    
+    winreg, send_message, internet_set_option = windows_api
+    
+    with winreg.OpenKey(winreg.HKEY_CURRENT_USER, _WINDOWS_INTERNET_SETTINGS, 0, winreg.KEY_SET_VALUE) as key:
+        winreg.SetValueEx(key, 'ProxyEnable', 0, winreg.REG_DWORD, 1 if enable else 0)
+        if enable:
+            winreg.SetValueEx(key, 'ProxyServer', 0, winreg.REG_SZ, server)
+    
+    # 刷新WinINet设置，使新代理立即生效
+    internet_set_option(0, _INTERNET_OPTION_SETTINGS_CHANGED, 0, 0)
+    internet_set_option(0, _INTERNET_OPTION_REFRESH, 0, 0)
+    
+    # 广播设置更改，跳过无响应窗口并限制等待时间
+    send_message(
+        _HWND_BROADCAST, _WM_SETTINGCHANGE, 0, ctypes.c_wchar_p("Internet Settings"),
+        _SMTO_ABORTIFHUNG, _SETTINGCHANGE_TIMEOUT_MS, ctypes.byref(ctypes.c_ulong())
+    )
+
+
 class CrossPlatformProxyManager:
     """跨平台系统代理管理器"""
     
+    # macOS网络服务探测结果的缓存时间（秒）
+    SERVICE_CACHE_TTL = 60.0
+    
     def __init__(self, host: str = "127.0.0.1", port: int = 7890):
         self.host = host
         self.port = port
         self.os_type = platform.system()
-        self.logger = logging.getLogger(__name__)
+        # Win32函数只解析一次；其他系统上不导入winreg
+        self._windows_api = _load_windows_api() if self.os_type == "Windows" else None
+        self._cached_service: Optional[Tuple[float, str]] = None
+        # 正在运行的子进程，关闭时统一终止
+        self._procs: Set[asyncio.subprocess.Process] = set()
+        # 按操作系统一次性绑定实现
+        self._set_impl = {
+            "Windows": self._set_windows_proxy,
+            "Darwin": self._set_macos_proxy,  # macOS
+            "Linux": self._set_linux_proxy
+        }.get(self.os_type)
+        self._unset_impl = {
+            "Windows": self._unset_windows_proxy,
+            "Darwin": self._unset_macos_proxy,
+            "Linux": self._unset_linux_proxy
+        }.get(self.os_type)
+        # dconf keyfile，对应 org.gnome.system.proxy 的全部设置
+        self._linux_proxy_config = (
+            f"[/]\nmode='manual'\n\n"
+            f"[http]\nhost='{host}'\nport={port}\n\n"
+            f"[https]\nhost='{host}'\nport={port}\n"
+        ).encode()
     
     async def set_system_proxy(self) -> bool:
         """开启系统代理"""
-        self.logger.info(f"🌐 为 {self.os_type} 设置系统代理: {self.host}:{self.port}")
+        logger.info("🌐 为 %s 设置系统代理: %s:%s", self.os_type, self.host, self.port)
+        
+        if self._set_impl is None:
+            logger.error("❌ 不支持的操作系统: %s", self.os_type)
+            return False
         
         try:
-            if self.os_type == "Windows":
-                return await self._set_windows_proxy()
-            elif self.os_type == "Darwin":  # macOS
-                return await self._set_macos_proxy()
-            elif self.os_type == "Linux":
-                return await self._set_linux_proxy()
-            else:
-                self.logger.error(f"❌ 不支持的操作系统: {self.os_type}")
-                return False
+            return await self._set_impl()
         except Exception as e:
-            self.logger.error(f"❌ 设置系统代理失败: {e}")
+            logger.error("❌ 设置系统代理失败: %s", e)
             return False
     
     async def unset_system_proxy(self) -> bool:
         """关闭系统代理"""
-        self.logger.info(f"🌐 为 {self.os_type} 关闭系统代理")
+        logger.info("🌐 为 %s 关闭系统代理", self.os_type)
+        
+        if self._unset_impl is None:
+            logger.error("❌ 不支持的操作系统: %s", self.os_type)
+            return False
         
         try:
-            if self.os_type == "Windows":
-                return await self._unset_windows_proxy()
-            elif self.os_type == "Darwin":
-                return await self._unset_macos_proxy()
-            elif self.os_type == "Linux":
-                return await self._unset_linux_proxy()
-            else:
-                self.logger.error(f"❌ 不支持的操作系统: {self.os_type}")
-                return False
+            return await self._unset_impl()
         except Exception as e:
-            self.logger.error(f"❌ 关闭系统代理失败: {e}")
+            logger.error("❌ 关闭系统代理失败: %s", e)
             return False
     
     async def _set_windows_proxy(self) -> bool:
         """设置Windows系统代理"""
+        if self._windows_api is None:
+            return False
+        
         try:
-            path = r'Software\Microsoft\Windows\CurrentVersion\Internet Settings'
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, path, 0, winreg.KEY_WRITE)
-            winreg.SetValueEx(key, 'ProxyEnable', 0, winreg.REG_DWORD, 1)
-            winreg.SetValueEx(key, 'ProxyServer', 0, winreg.REG_SZ, f'{self.host}:{self.port}')
-            winreg.CloseKey(key)
-            
-            # 通知系统代理设置更改
-            import ctypes
-            ctypes.windll.user32.SendMessageW(0xFFFF, 0x001A, 0, "Internet Settings")
+            await asyncio.get_running_loop().run_in_executor(
+                None, _apply_windows_proxy, self._windows_api, True, f'{self.host}:{self.port}'
+            )
             
-            self.logger.info("✅ Windows系统代理设置成功")
+            logger.info("✅ Windows系统代理设置成功")
             return True
         except Exception as e:
-            self.logger.error(f"❌ Windows系统代理设置失败: {e}")
+            logger.error("❌ Windows系统代理设置失败: %s", e)
             return False
     
     async def _unset_windows_proxy(self) -> bool:
         """关闭Windows系统代理"""
+        if self._windows_api is None:
+            return False
+        
         try:
-            path = r'Software\Microsoft\Windows\CurrentVersion\Internet Settings'
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, path, 0, winreg.KEY_WRITE)
-            winreg.SetValueEx(key, 'ProxyEnable', 0, winreg.REG_DWORD, 0)
-            winreg.CloseKey(key)
-            
-            # 通知系统代理设置更改
-            import ctypes
-            ctypes.windll.user32.SendMessageW(0xFFFF, 0x001A, 0, "Internet Settings")
+            await asyncio.get_running_loop().run_in_executor(
+                None, _apply_windows_proxy, self._windows_api, False, None
+            )
             
-            self.logger.info("✅ Windows系统代理关闭成功")
+            logger.info("✅ Windows系统代理关闭成功")
             return True
         except Exception as e:
-            self.logger.error(f"❌ Windows系统代理关闭失败: {e}")
+            logger.error("❌ Windows系统代理关闭失败: %s", e)
             return False
     
     async def _set_macos_proxy(self) -> bool:
         """设置macOS系统代理"""
         try:
             service = await self._get_active_mac_network_service()
-            self.logger.info(f"🍎 使用网络服务: {service}")
+            logger.info("🍎 使用网络服务: %s", service)
             
-            # 使用asyncio运行subprocess
-            await asyncio.create_subprocess_exec(
-                'networksetup', '-setwebproxy', service, self.host, str(self.port)
-            )
-            await asyncio.create_subprocess_exec(
-                'networksetup', '-setsecurewebproxy', service, self.host, str(self.port)
+            # HTTP与HTTPS代理互不依赖，并发设置
+            results = await asyncio.gather(
+                self._run_command('networksetup', '-setwebproxy', service, self.host, str(self.port)),
+                self._run_command('networksetup', '-setsecurewebproxy', service, self.host, str(self.port))
             )
+            if not all(results):
+                raise RuntimeError("networksetup 执行失败")
             
-            self.logger.info("✅ macOS系统代理设置成功")
+            logger.info("✅ macOS系统代理设置成功")
             return True
         except Exception as e:
-            self.logger.error(f"❌ macOS系统代理设置失败: {e}")
+            logger.error("❌ macOS系统代理设置失败: %s", e)
             return False
     
     async def _unset_macos_proxy(self) -> bool:
@@ -191,85 +308,175 @@ class CrossPlatformProxyManager:
         try:
             service = await self._get_active_mac_network_service()
             
-            await asyncio.create_subprocess_exec(
-                'networksetup', '-setwebproxystate', service, 'off'
-            )
-            await asyncio.create_subprocess_exec(
-                'networksetup', '-setsecurewebproxystate', service, 'off'
+            results = await asyncio.gather(
+                self._run_command('networksetup', '-setwebproxystate', service, 'off'),
+                self._run_command('networksetup', '-setsecurewebproxystate', service, 'off')
             )
+            if not all(results):
+                raise RuntimeError("networksetup 执行失败")
             
-            self.logger.info("✅ macOS系统代理关闭成功")
+            logger.info("✅ macOS系统代理关闭成功")
             return True
         except Exception as e:
-            self.logger.error(f"❌ macOS系统代理关闭失败: {e}")
+            logger.error("❌ macOS系统代理关闭失败: %s", e)
             return False
     
     async def _set_linux_proxy(self) -> bool:
         """设置Linux系统代理"""
         try:
-            commands = [
-                ['gsettings', 'set', 'org.gnome.system.proxy', 'mode', "'manual'"],
-                ['gsettings', 'set', 'org.gnome.system.proxy.http', 'host', f"'{self.host}'"],
-                ['gsettings', 'set', 'org.gnome.system.proxy.http', 'port', str(self.port)],
-                ['gsettings', 'set', 'org.gnome.system.proxy.https', 'host', f"'{self.host}'"],
-                ['gsettings', 'set', 'org.gnome.system.proxy.https', 'port', str(self.port)]
-            ]
-            
-            for cmd in commands:
-                await asyncio.create_subprocess_exec(*cmd)
+            # 一次dconf load写入全部GNOME代理配置
+            if not await self._run_command('dconf', 'load', '/org/gnome/system/proxy/', stdin=self._linux_proxy_config):
+                raise RuntimeError("dconf load 执行失败")
             
-            self.logger.info("✅ Linux系统代理设置成功")
+            logger.info("✅ Linux系统代理设置成功")
             return True
         except Exception as e:
-            self.logger.error(f"❌ Linux系统代理设置失败: {e}")
+            logger.error("❌ Linux系统代理设置失败: %s", e)
             return False
     
     async def _unset_linux_proxy(self) -> bool:
         """关闭Linux系统代理"""
         try:
-            await asyncio.create_subprocess_exec(
-                'gsettings', 'set', 'org.gnome.system.proxy', 'mode', "'none'"
-            )
-            self.logger.info("✅ Linux系统代理关闭成功")
+            if not await self._run_command('gsettings', 'set', 'org.gnome.system.proxy', 'mode', "'none'"):
+                raise RuntimeError("gsettings 执行失败")
+            logger.info("✅ Linux系统代理关闭成功")
             return True
         except Exception as e:
-            self.logger.error(f"❌ Linux系统代理关闭失败: {e}")
+            logger.error("❌ Linux系统代理关闭失败: %s", e)
             return False
     
+    async def _run_command(self, *cmd: str, stdin: Optional[bytes] = None) -> bool:
+        """运行外部命令并等待完成，返回是否成功"""
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self._procs.add(proc)
+        try:
+            _, stderr = await proc.communicate(stdin)
+        finally:
+            self._procs.discard(proc)
+        if proc.returncode != 0:
+            logger.error("❌ 命令失败 (%s): %s %s", proc.returncode, ' '.join(cmd), stderr.decode(errors='ignore').strip())
+            return False
+        return True
+    
+    def terminate_processes(self):
+        """终止仍在运行的子进程"""
+        for proc in list(self._procs):
+            if proc.returncode is None:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+        self._procs.clear()
+    
     async def _get_active_mac_network_service(self) -> str:
-        """获取macOS活动网络服务"""
+        """获取macOS活动网络服务（带缓存）"""
+        cached = self._cached_service
+        if cached and time.monotonic() - cached[0] < self.SERVICE_CACHE_TTL:
+            return cached[1]
+        
         try:
             # 简化版本，返回常用的网络服务名
-            return "Wi-Fi"
+            service = "Wi-Fi"
         except Exception:
-            return "Wi-Fi"
+            service = "Wi-Fi"
+        
+        self._cached_service = (time.monotonic(), service)
+        return service
+
+# 默认IP查询服务
+DEFAULT_IP_CHECK_URLS = (
+    "https://api.ipify.org?format=json",
+    "https://ifconfig.me/ip",
+    "http://httpbin.org/ip"
+)
+
 
 class EnhancedProxyManager:
     """增强版代理管理器 - 结合智能切换和精确控制"""
     
-    def __init__(self, clash_uri: str = "http://127.0.0.1:9090", clash_secret: str = ""):
+    # 当前IP缓存时间（秒）
+    IP_CACHE_TTL = 2.0
+    
+    def __init__(self, clash_uri: str = "http://127.0.0.1:9090", clash_secret: str = "",
+                 ip_check_urls: Optional[List[str]] = None,
+                 probe_interval: float = 0.25, max_wait: float = 3.0,
+                 history_limit: int = 1000):
         self.clash_api = EnhancedClashAPI(clash_uri, clash_secret)
         self.system_proxy = CrossPlatformProxyManager()
-        self.logger = logging.getLogger(__name__)
-        self.switch_history = []
-        self.last_switch_time = None
+        # 有界历史记录；时间戳在写入时即序列化为ISO字符串
+        self.switch_history: Deque[Dict] = deque(maxlen=history_limit)
+        self.last_switch_time: Optional[str] = None
+        # 累计计数，避免统计时遍历历史记录
+        self._total_switches = 0
+        self._ip_changes = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        # 并发查询的IP服务，取最先返回的结果
+        self.ip_check_urls = ip_check_urls or list(DEFAULT_IP_CHECK_URLS)
+        self._ip_cache: Optional[Tuple[float, str]] = None
+        # 节点 -> 最近观测到的出口IP
+        self._known_node_ips: Dict[str, str] = {}
+        # 切换后轮询IP的间隔与最长等待时间（秒）
+        self.probe_interval = probe_interval
+        self.max_wait = max_wait
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取用于IP查询的复用HTTP会话（懒加载）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                # 每次探测都新建连接：TUN/系统代理模式下复用的连接会停留在切换前的节点上
+                connector=aiohttp.TCPConnector(limit=20, force_close=True)
+            )
+        return self._session
+    
+    async def __aenter__(self):
+        """注册清理回调（可重复调用）"""
+        if self._exit_stack is None:
+            stack = AsyncExitStack()
+            stack.callback(self.system_proxy.terminate_processes)
+            stack.push_async_callback(self.clash_api.aclose)
+            stack.push_async_callback(self._close_session)
+            self._exit_stack = stack
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+    
+    async def aclose(self):
+        """关闭所有HTTP会话并终止未完成的子进程"""
+        await self.__aenter__()
+        stack, self._exit_stack = self._exit_stack, None
+        await stack.aclose()
+    
+    async def _close_session(self):
+        """关闭IP查询会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def get_current_status(self) -> Dict:
         """获取当前代理状态"""
-        selectors = await self.clash_api.get_selector_groups()
+        proxies = await self.clash_api.get_proxies()
+        selectors = await self.clash_api.get_selector_groups(proxies or {})
         
         status = {
             'clash_available': len(selectors) > 0,
             'selector_groups': selectors,
-            'switch_count': len(self.switch_history),
-            'last_switch': self.last_switch_time.isoformat() if self.last_switch_time else None
+            'switch_count': self._total_switches,
+            'last_switch': self.last_switch_time
         }
         
         return status
     
     async def switch_to_specific_node(self, selector_name: str, node_name: str) -> bool:
         """切换到指定的代理节点"""
-        self.logger.info(f"🎯 精确切换: {selector_name} -> {node_name}")
+        logger.info("🎯 精确切换: %s -> %s", selector_name, node_name)
         
         # 获取当前IP
         ip_before = await self._get_current_ip()
@@ -278,15 +485,15 @@ class EnhancedProxyManager:
         success = await self.clash_api.switch_proxy(selector_name, node_name)
         
         if success:
-            # 等待切换生效
-            await asyncio.sleep(3)
-            
-            # 获取切换后IP
-            ip_after = await self._get_current_ip()
+            # 等待切换生效并获取切换后IP
+            ip_after = await self._wait_for_ip_change(ip_before)
+            if ip_after:
+                self._known_node_ips[node_name] = ip_after
             
             # 记录切换历史
-            self.switch_history.append({
-                'timestamp': datetime.now(),
+            timestamp = datetime.now().isoformat()
+            self._record_switch({
+                'timestamp': timestamp,
                 'selector': selector_name,
                 'node': node_name,
                 'ip_before': ip_before,
@@ -294,94 +501,101 @@ class EnhancedProxyManager:
                 'ip_changed': ip_before != ip_after if ip_before and ip_after else False
             })
             
-            self.last_switch_time = datetime.now()
+            self.last_switch_time = timestamp
             
-            self.logger.info(f"✅ 精确切换成功: {ip_before} -> {ip_after}")
+            logger.info("✅ 精确切换成功: %s -> %s", ip_before, ip_after)
             return True
         else:
-            self.logger.error("❌ 精确切换失败")
+            logger.error("❌ 精确切换失败")
             return False
     
     async def smart_switch_with_ip_change(self, selector_name: str = "PROXY", max_attempts: int = 5) -> bool:
         """智能切换 - 尝试找到不同IP的节点"""
-        self.logger.info(f"🧠 智能切换: 寻找不同IP的节点")
+        logger.info("🧠 智能切换: 寻找不同IP的节点")
         
         # 获取当前IP和节点
         current_ip = await self._get_current_ip()
         available_nodes = await self.clash_api.get_available_nodes(selector_name)
         
         if not available_nodes:
-            self.logger.error(f"❌ 策略组 {selector_name} 没有可用节点")
+            logger.error("❌ 策略组 %s 没有可用节点", selector_name)
             return False
         
-        self.logger.info(f"🔍 当前IP: {current_ip}")
-        self.logger.info(f"📋 可用节点: {len(available_nodes)} 个")
+        logger.info("🔍 当前IP: %s", current_ip)
+        logger.info("📋 可用节点: %s 个", len(available_nodes))
+        
+        # 跳过已知出口IP与当前相同的节点，并随机选择候选节点
+        candidates = [node for node in available_nodes if self._known_node_ips.get(node) != current_ip]
+        if not candidates:
+            candidates = available_nodes
         
         # 尝试切换到不同的节点
-        for attempt in range(min(max_attempts, len(available_nodes))):
-            # 选择下一个节点
-            node_index = attempt % len(available_nodes)
-            target_node = available_nodes[node_index]
-            
-            self.logger.info(f"🔄 尝试 {attempt + 1}/{max_attempts}: {target_node}")
+        for attempt, target_node in enumerate(random.sample(candidates, k=min(max_attempts, len(candidates))), start=1):
+            logger.info("🔄 尝试 %s/%s: %s", attempt, max_attempts, target_node)
             
             # 切换节点
             if await self.clash_api.switch_proxy(selector_name, target_node):
-                await asyncio.sleep(3)
-                
                 # 检查新IP
-                new_ip = await self._get_current_ip()
+                new_ip = await self._wait_for_ip_change(current_ip)
+                if new_ip:
+                    self._known_node_ips[target_node] = new_ip
                 
                 if new_ip and new_ip != current_ip:
-                    self.logger.info(f"🎉 找到不同IP: {current_ip} -> {new_ip}")
+                    logger.info("🎉 找到不同IP: %s -> %s", current_ip, new_ip)
                     
                     # 记录成功的切换
-                    self.switch_history.append({
-                        'timestamp': datetime.now(),
+                    timestamp = datetime.now().isoformat()
+                    self._record_switch({
+                        'timestamp': timestamp,
                         'selector': selector_name,
                         'node': target_node,
                         'ip_before': current_ip,
                         'ip_after': new_ip,
                         'ip_changed': True,
-                        'attempts': attempt + 1
+                        'attempts': attempt
                     })
                     
-                    self.last_switch_time = datetime.now()
+                    self.last_switch_time = timestamp
                     return True
                 else:
-                    self.logger.warning(f"⚠️ IP未改变: {new_ip}")
+                    logger.warning("⚠️ IP未改变: %s", new_ip)
             else:
-                self.logger.warning(f"⚠️ 切换到 {target_node} 失败")
+                logger.warning("⚠️ 切换到 %s 失败", target_node)
         
-        self.logger.warning(f"⚠️ 经过 {max_attempts} 次尝试，未找到不同IP的节点")
+        logger.warning("⚠️ 经过 %s 次尝试，未找到不同IP的节点", max_attempts)
         return False
     
-    async def force_system_proxy_cycle(self) -> bool:
+    async def force_system_proxy_cycle(self, probe_direct: bool = False) -> bool:
         """强制系统代理循环 - 禁用再启用"""
-        self.logger.info("🔄 执行强制系统代理循环")
+        logger.info("🔄 执行强制系统代理循环")
         
-        # 获取切换前IP
-        ip_before = await self._get_current_ip()
+        # 获取切换前IP，与禁用系统代理同时进行
+        ip_before_task = asyncio.ensure_future(self._get_current_ip())
         
         # 禁用系统代理
         await self.system_proxy.unset_system_proxy()
-        await asyncio.sleep(2)
+        ip_before = await ip_before_task
+        self._invalidate_ip()
         
-        # 获取直连IP
-        direct_ip = await self._get_current_ip()
+        # 获取直连IP（仅用于日志，按需探测）
+        direct_ip = None
+        if probe_direct:
+            await asyncio.sleep(2)
+            direct_ip = await self._get_current_ip()
         
         # 重新启用系统代理
         await self.system_proxy.set_system_proxy()
-        await asyncio.sleep(3)
+        self._invalidate_ip()
+        await self._wait_for_proxy_port()
         
         # 获取恢复后IP
-        ip_after = await self._get_current_ip()
+        ip_after = await self._wait_for_ip_change(ip_before)
         
-        self.logger.info(f"🔄 代理循环: {ip_before} -> {direct_ip} -> {ip_after}")
+        logger.info("🔄 代理循环: %s -> %s -> %s", ip_before, direct_ip, ip_after)
         
         # 记录循环操作
-        self.switch_history.append({
-            'timestamp': datetime.now(),
+        self._record_switch({
+            'timestamp': datetime.now().isoformat(),
             'type': 'system_proxy_cycle',
             'ip_before': ip_before,
             'direct_ip': direct_ip,
@@ -391,41 +605,133 @@ class EnhancedProxyManager:
         
         return ip_before != ip_after if ip_before and ip_after else False
     
+    def _record_switch(self, entry: Dict):
+        """记录切换历史并更新统计计数"""
+        self.switch_history.append(entry)
+        self._total_switches += 1
+        if entry.get('ip_changed', False):
+            self._ip_changes += 1
+    
+    def _invalidate_ip(self):
+        """出口可能已变化，丢弃缓存的IP"""
+        self._ip_cache = None
+    
     async def _get_current_ip(self) -> Optional[str]:
-        """获取当前IP地址"""
+        """获取当前IP地址（短时缓存，多个服务竞速）"""
+        cached = self._ip_cache
+        if cached and time.monotonic() - cached[0] < self.IP_CACHE_TTL:
+            return cached[1]
+        
+        pending = {asyncio.ensure_future(self._fetch_ip(url)) for url in self.ip_check_urls}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ip = task.result()
+                    if ip:
+                        self._ip_cache = (time.monotonic(), ip)
+                        return ip
+        finally:
+            for task in pending:
+                task.cancel()
+        return None
+    
+    async def _wait_for_ip_change(self, previous_ip: Optional[str]) -> Optional[str]:
+        """切换后轮询IP，一旦与之前不同立即返回，最多等待max_wait秒"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        
+        while True:
+            self._invalidate_ip()
+            ip = await self._get_current_ip()
+            if ip and ip != previous_ip:
+                return ip
+            if loop.time() + self.probe_interval >= deadline:
+                return ip
+            await asyncio.sleep(self.probe_interval)
+    
+    async def _wait_for_proxy_port(self):
+        """等待本地代理端口可连接，最多等待max_wait秒"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        host, port = self.system_proxy.host, self.system_proxy.port
+        
+        while loop.time() < deadline:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=0.5)
+                writer.close()
+                return
+            except (OSError, asyncio.TimeoutError):
+                await asyncio.sleep(self.probe_interval)
+    
+    async def _fetch_ip(self, url: str) -> Optional[str]:
+        """从单个服务查询IP，兼容JSON与纯文本响应"""
         try:
-            timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get("http://httpbin.org/ip") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('origin', '').split(',')[0].strip()
+            session = await self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    text = (await response.text()).strip()
+                    if text.startswith('{'):
+                        data = _json_loads(text)
+                        text = data.get('ip') or data.get('origin', '')
+                    return text.split(',')[0].strip() or None
         except Exception as e:
-            self.logger.debug(f"获取IP失败: {e}")
-            return None
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("获取IP失败 (%s): %s", url, e)
+        return None
     
     def get_switch_statistics(self) -> Dict:
         """获取切换统计信息"""
-        if not self.switch_history:
+        if not self._total_switches:
             return {'total_switches': 0, 'ip_changes': 0, 'success_rate': 0}
         
-        ip_changes = len([h for h in self.switch_history if h.get('ip_changed', False)])
-        success_rate = (ip_changes / len(self.switch_history)) * 100
+        success_rate = (self._ip_changes / self._total_switches) * 100
         
         return {
-            'total_switches': len(self.switch_history),
-            'ip_changes': ip_changes,
+            'total_switches': self._total_switches,
+            'ip_changes': self._ip_changes,
             'success_rate': success_rate,
-            'last_switch': self.last_switch_time.isoformat() if self.last_switch_time else None
+            'last_switch': self.last_switch_time
         }
 
 
 # 全局实例
 _enhanced_proxy_manager = None
+_enhanced_proxy_manager_lock = threading.Lock()
 
-async def get_enhanced_proxy_manager() -> EnhancedProxyManager:
-    """获取增强版代理管理器实例"""
+def get_enhanced_proxy_manager_sync() -> EnhancedProxyManager:
+    """获取增强版代理管理器实例（同步，线程安全）"""
     global _enhanced_proxy_manager
     if _enhanced_proxy_manager is None:
-        _enhanced_proxy_manager = EnhancedProxyManager()
+        with _enhanced_proxy_manager_lock:
+            if _enhanced_proxy_manager is None:
+                _enhanced_proxy_manager = EnhancedProxyManager()
+                atexit.register(_close_at_exit)
     return _enhanced_proxy_manager
+
+async def get_enhanced_proxy_manager() -> EnhancedProxyManager:
+    """获取增强版代理管理器实例（已进入上下文）"""
+    manager = get_enhanced_proxy_manager_sync()
+    return await manager.__aenter__()
+
+async def shutdown_enhanced_proxy_manager():
+    """关闭全局增强版代理管理器（用于应用关闭钩子）"""
+    global _enhanced_proxy_manager
+    with _enhanced_proxy_manager_lock:
+        manager, _enhanced_proxy_manager = _enhanced_proxy_manager, None
+    if manager is not None:
+        await manager.aclose()
+
+def _close_at_exit():
+    """进程退出时的兜底清理（应用未调用关闭钩子时）"""
+    if _enhanced_proxy_manager is None:
+        return
+    try:
+        asyncio.get_running_loop()
+        return  # 事件循环仍在运行，无法在此同步清理
+    except RuntimeError:
+        pass
+    try:
+        asyncio.run(shutdown_enhanced_proxy_manager())
+    except Exception as e:
+        logger.debug("退出时清理代理管理器失败: %s", e)
@@ -1,527 +1,1213 @@
-"""
-Large Language Model API service integration.
-"""
-
-import asyncio
-import logging
-import json
-import traceback
-from typing import Dict, Optional, Any, List
-from dataclasses import dataclass
-from datetime import datetime
-import aiohttp
-
-
-@dataclass
-class LLMResponse:
-    """LLM API response."""
-    content: str
-    success: bool = True
-    error: Optional[str] = None
-    usage: Optional[Dict[str, Any]] = None
-    model: Optional[str] = None
-    finish_reason: Optional[str] = None
-
-
-class LLMAPIService:
-    """Large Language Model API service."""
-    
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
-        self.base_url = "http://localhost:8000/v1/chat/completions"
-        self.api_key = "sk-dummy-f4689c69ad5746a8bb5b5e897b4033c7"
-        self.timeout = aiohttp.ClientTimeout(total=300, connect=30, sock_read=60)  # 5 minutes total, 30s connect, 60s read
-        self.default_model = "Claude-4-Sonnet"  # 使用Claude-4-Sonnet模型
-        
-    async def translate_content(
-        self, 
-        content: str, 
-        title: str = "", 
-        source_language: str = "en", 
-        target_language: str = "zh",
-        custom_prompt: str = ""
-    ) -> LLMResponse:
-        """
-        Translate article content.
-        
-        Args:
-            content: Content to translate
-            title: Article title
-            source_language: Source language code
-            target_language: Target language code
-            custom_prompt: Custom translation prompt
-            
-        Returns:
-            LLMResponse with translated content
-        """
-        try:
-            self.logger.info(f"Starting content translation from {source_language} to {target_language}")
-            
-            # Build translation prompt
-            if custom_prompt:
-                prompt = custom_prompt
-            else:
-                prompt = self._build_translation_prompt(content, title, source_language, target_language)
-            
-            # Call LLM API
-            response = await self._call_api(prompt)
-            
-            if response.success:
-                self.logger.info("Content translation completed successfully")
-            else:
-                self.logger.error(f"Content translation failed: {response.error}")
-            
-            return response
-            
-        except Exception as e:
-            self.logger.error(f"Translation error: {e}")
-            return LLMResponse(
-                content="",
-                success=False,
-                error=str(e)
-            )
-    
-    async def optimize_content(
-        self, 
-        content: str, 
-        title: str = "", 
-        platform: str = "toutiao",
-        optimization_type: str = "standard",
-        custom_prompt: str = ""
-    ) -> LLMResponse:
-        """
-        Optimize article content for specific platform.
-        
-        Args:
-            content: Content to optimize
-            title: Article title
-            platform: Target platform (toutiao, weixin, etc.)
-            optimization_type: Type of optimization (standard, seo, engagement)
-            custom_prompt: Custom optimization prompt
-            
-        Returns:
-            LLMResponse with optimized content
-        """
-        try:
-            self.logger.info(f"Starting content optimization for platform: {platform}")
-            
-            # Build optimization prompt
-            if custom_prompt:
-                prompt = custom_prompt
-            else:
-                prompt = self._build_optimization_prompt(content, title, platform, optimization_type)
-            
-            # Call LLM API
-            response = await self._call_api(prompt)
-            
-            if response.success:
-                self.logger.info("Content optimization completed successfully")
-            else:
-                self.logger.error(f"Content optimization failed: {response.error}")
-            
-            return response
-            
-        except Exception as e:
-            self.logger.error(f"Optimization error: {e}")
-            return LLMResponse(
-                content="",
-                success=False,
-                error=str(e)
-            )
-
-    async def create_content_by_topic(
-        self,
-        topic: str,
-        keywords: list = None,
-        requirements: str = "",
-        custom_prompt: str = None,
-        model: str = None,
-        target_length: str = "mini",
-        **api_params
-    ) -> LLMResponse:
-        """Create content based on topic using LLM API."""
-        try:
-            self.logger.info(f"🎨 开始主题内容创作: {topic}")
-            self.logger.info(f"📏 目标长度: {target_length}")
-
-            # 定义目标长度映射
-            length_mapping = {
-                "mini": {"words": "300-500", "description": "简短文章"},
-                "short": {"words": "500-800", "description": "短篇文章"},
-                "medium": {"words": "800-1500", "description": "中等长度文章"},
-                "long": {"words": "1500-3000", "description": "长篇文章"}
-            }
-
-            length_info = length_mapping.get(target_length, length_mapping["mini"])
-            self.logger.info(f"📊 字数要求: {length_info['words']} 字 ({length_info['description']})")
-
-            if custom_prompt:
-                # 处理自定义提示词，添加长度要求
-                self.logger.info("📝 使用自定义创作提示词")
-
-                # 检查是否包含长度变量占位符
-                if "{target_length}" in custom_prompt:
-                    prompt = custom_prompt.format(target_length=length_info['words'])
-                    self.logger.info("✅ 已填充目标长度变量")
-                elif "字数" not in custom_prompt and "长度" not in custom_prompt:
-                    # 如果自定义提示词没有长度要求，添加长度指导
-                    prompt = custom_prompt + f"\n\n**字数要求：** 请控制文章字数在 {length_info['words']} 字之间。"
-                    self.logger.info("✅ 已添加字数要求到自定义提示词")
-                else:
-                    prompt = custom_prompt
-                    self.logger.info("ℹ️  自定义提示词已包含长度要求")
-            else:
-                # Build default creation prompt with target length
-                self.logger.info("📝 使用默认创作提示词")
-                prompt_parts = [
-                    "你是一位专业的内容创作专家。请根据以下要求创作一篇高质量的文章：",
-                    "",
-                    f"主题：{topic}",
-                ]
-
-                if keywords:
-                    prompt_parts.append(f"关键词：{', '.join(keywords)}")
-
-                if requirements:
-                    prompt_parts.append(f"创作要求：{requirements}")
-
-                # 添加字数要求
-                prompt_parts.append(f"字数要求：{length_info['words']} 字")
-
-                prompt_parts.extend([
-                    "",
-                    "请确保文章：",
-                    "1. 内容原创且有深度",
-                    "2. 结构清晰，逻辑性强",
-                    "3. 语言流畅，符合中文表达习惯",
-                    "4. 包含实用价值和见解",
-                    f"5. 字数严格控制在 {length_info['words']} 字之间",
-                    "",
-                    "请直接输出文章内容，不需要额外的说明。"
-                ])
-
-                prompt = "\n".join(prompt_parts)
-
-            # Call LLM API with configurable parameters
-            result = await self._call_api(prompt, model, **api_params)
-
-            if result.success:
-                self.logger.info("✅ 主题内容创作成功")
-                self.logger.info(f"📝 创作内容长度: {len(result.content)} 字符")
-
-                # Try to extract title from content if possible
-                lines = result.content.strip().split('\n')
-                potential_title = lines[0].strip() if lines else ""
-
-                # Simple heuristic to detect if first line is a title
-                if (len(potential_title) < 100 and
-                    not potential_title.endswith('。') and
-                    not potential_title.endswith('.') and
-                    len(lines) > 1):
-                    result.title = potential_title
-                    result.content = '\n'.join(lines[1:]).strip()
-                    self.logger.info(f"📰 提取到标题: {potential_title}")
-
-            return result
-
-        except Exception as e:
-            self.logger.error(f"💥 主题内容创作异常: {str(e)}")
-            return LLMResponse(
-                success=False,
-                content="",
-                message=f"主题内容创作失败: {str(e)}"
-            )
-
-    async def _call_api(self, prompt: str, model: str = None, **kwargs) -> LLMResponse:
-        """Call the LLM API with improved error handling and configurable parameters."""
-        try:
-            self.logger.info(f"🚀 开始调用LLM API...")
-            self.logger.info(f"🔗 API地址: {self.base_url}")
-            self.logger.info(f"🤖 使用模型: {model or self.default_model}")
-
-            # 全量显示发送给API的提示词内容
-            self.logger.info("📤 发送给LLM的完整提示词内容:")
-            self.logger.info("=" * 80)
-            self.logger.info(prompt)
-            self.logger.info("=" * 80)
-
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-
-            # 可配置的API参数，支持通过kwargs传递
-            # Claude的最大tokens限制约为200k，设置为较大值以避免截断
-            default_max_tokens = 100000  # 使用较大的默认值
-
-            payload = {
-                "model": model or self.default_model,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "temperature": kwargs.get('temperature', 0.7),
-                "max_tokens": kwargs.get('max_tokens', default_max_tokens),
-                "top_p": kwargs.get('top_p', 1.0),
-                "frequency_penalty": kwargs.get('frequency_penalty', 0.0),
-                "presence_penalty": kwargs.get('presence_penalty', 0.0)
-            }
-
-            self.logger.info(f"📊 请求参数:")
-            self.logger.info(f"   🌡️  温度: {payload['temperature']}")
-            self.logger.info(f"   📏 最大tokens: {payload['max_tokens']}")
-            self.logger.info(f"   🎯 top_p: {payload['top_p']}")
-            self.logger.info(f"   🔄 frequency_penalty: {payload['frequency_penalty']}")
-            self.logger.info(f"   👥 presence_penalty: {payload['presence_penalty']}")
-
-            self.logger.info(f"📦 请求载荷大小: {len(str(payload))} 字符")
-
-            # Use connector with proper settings to avoid connection issues
-            connector = aiohttp.TCPConnector(
-                limit=10,
-                limit_per_host=5,
-                keepalive_timeout=30,
-                enable_cleanup_closed=True
-            )
-
-            async with aiohttp.ClientSession(
-                timeout=self.timeout,
-                connector=connector,
-                headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
-            ) as session:
-                self.logger.info("🌐 正在发送API请求...")
-                async with session.post(self.base_url, headers=headers, json=payload) as response:
-                    self.logger.info(f"📡 收到响应，状态码: {response.status}")
-
-                    if response.status == 200:
-                        # Check content type to determine how to parse response
-                        content_type = response.headers.get('content-type', '')
-                        self.logger.info(f"📋 响应内容类型: {content_type}")
-
-                        if 'text/event-stream' in content_type:
-                            # Handle Server-Sent Events (SSE) streaming response
-                            self.logger.info("🌊 检测到流式响应，开始处理SSE数据...")
-                            content = await self._parse_sse_response(response)
-                            return LLMResponse(
-                                content=content,
-                                success=True,
-                                error=""
-                            )
-                        else:
-                            # Handle standard JSON response
-                            data = await response.json()
-                            self.logger.info("✅ API调用成功，正在解析JSON响应...")
-                            return self._parse_api_response(data)
-                    else:
-                        error_text = await response.text()
-                        self.logger.error(f"❌ API请求失败，状态码: {response.status}")
-                        self.logger.error(f"💬 错误详情: {error_text}")
-                        return LLMResponse(
-                            content="",
-                            success=False,
-                            error=f"API request failed: {response.status} - {error_text}"
-                        )
-
-        except asyncio.CancelledError:
-            self.logger.error("⚠️ API调用被取消")
-            return LLMResponse(
-                content="",
-                success=False,
-                error="API call was cancelled"
-            )
-        except asyncio.TimeoutError:
-            self.logger.error("⏰ API调用超时")
-            return LLMResponse(
-                content="",
-                success=False,
-                error="API call timed out"
-            )
-        except Exception as e:
-            self.logger.error(f"💥 API调用异常: {e}")
-            import traceback
-            self.logger.error(f"💥 异常堆栈: {traceback.format_exc()}")
-            return LLMResponse(
-                content="",
-                success=False,
-                error=str(e)
-            )
-
-    async def _parse_sse_response(self, response) -> str:
-        """Parse Server-Sent Events (SSE) streaming response."""
-        try:
-            self.logger.info("🔄 开始解析SSE流式响应...")
-            content_parts = []
-
-            async for line in response.content:
-                line_str = line.decode('utf-8').strip()
-
-                if line_str.startswith('data: '):
-                    data_str = line_str[6:]  # Remove 'data: ' prefix
-
-                    if data_str == '[DONE]':
-                        self.logger.info("✅ SSE流结束")
-                        break
-
-                    try:
-                        import json
-                        data = json.loads(data_str)
-
-                        # Extract content from the streaming response
-                        if 'choices' in data and len(data['choices']) > 0:
-                            choice = data['choices'][0]
-                            if 'delta' in choice and 'content' in choice['delta']:
-                                content_chunk = choice['delta']['content']
-                                content_parts.append(content_chunk)
-                                self.logger.debug(f"📝 收到内容块: {content_chunk[:50]}...")
-                            elif 'message' in choice and 'content' in choice['message']:
-                                # Handle non-streaming format
-                                content_chunk = choice['message']['content']
-                                content_parts.append(content_chunk)
-                                self.logger.debug(f"📝 收到完整内容: {content_chunk[:50]}...")
-
-                    except json.JSONDecodeError as e:
-                        self.logger.debug(f"⚠️ 跳过非JSON行: {line_str[:100]}...")
-                        continue
-
-            full_content = ''.join(content_parts)
-            self.logger.info(f"✅ SSE解析完成，总内容长度: {len(full_content)} 字符")
-            return full_content
-
-        except Exception as e:
-            self.logger.error(f"💥 SSE解析异常: {e}")
-            # Fallback: try to read as plain text
-            try:
-                text_content = await response.text()
-                self.logger.info("🔄 尝试作为纯文本读取...")
-                return text_content
-            except Exception as fallback_e:
-                self.logger.error(f"💥 纯文本读取也失败: {fallback_e}")
-                return ""
-
-    def _parse_api_response(self, data: Dict[str, Any]) -> LLMResponse:
-        """Parse API response."""
-        try:
-            choices = data.get("choices", [])
-            if not choices:
-                return LLMResponse(
-                    content="",
-                    success=False,
-                    error="No choices in API response"
-                )
-            
-            choice = choices[0]
-            message = choice.get("message", {})
-            content = message.get("content", "").strip()
-            
-            usage = data.get("usage", {})
-            model = data.get("model", "")
-            finish_reason = choice.get("finish_reason", "")
-            
-            return LLMResponse(
-                content=content,
-                success=True,
-                usage=usage,
-                model=model,
-                finish_reason=finish_reason
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Error parsing API response: {e}")
-            return LLMResponse(
-                content="",
-                success=False,
-                error=f"Error parsing response: {str(e)}"
-            )
-    
-    def _build_translation_prompt(
-        self, 
-        content: str, 
-        title: str, 
-        source_lang: str, 
-        target_lang: str
-    ) -> str:
-        """Build translation prompt."""
-        lang_names = {
-            "en": "英文",
-            "zh": "中文",
-            "ja": "日文",
-            "ko": "韩文"
-        }
-        
-        source_name = lang_names.get(source_lang, source_lang)
-        target_name = lang_names.get(target_lang, target_lang)
-        
-        prompt = f"""请将以下{source_name}文章翻译成{target_name}，要求：
-
-1. 保持原文的语义和语调
-2. 使用自然流畅的{target_name}表达
-3. 保留专业术语的准确性
-4. 适当调整句式以符合{target_name}阅读习惯
-5. 保持段落结构不变
-
-"""
-        
-        if title:
-            prompt += f"文章标题：{title}\n\n"
-        
-        prompt += f"文章内容：\n{content}\n\n请直接输出翻译结果，不要添加任何解释或说明。"
-        
-        return prompt
-    
-    def _build_optimization_prompt(
-        self, 
-        content: str, 
-        title: str, 
-        platform: str, 
-        optimization_type: str
-    ) -> str:
-        """Build content optimization prompt."""
-        platform_rules = {
-            "toutiao": "今日头条平台特点：标题要吸引眼球，内容要有争议性和话题性，适合大众阅读",
-            "weixin": "微信公众号平台特点：内容要有价值，标题要精准，适合分享传播",
-            "zhihu": "知乎平台特点：内容要专业深入，逻辑清晰，有知识价值",
-            "xiaohongshu": "小红书平台特点：内容要生活化，有实用价值，适合年轻用户"
-        }
-        
-        optimization_rules = {
-            "standard": "标准优化：提升可读性，优化结构，增强吸引力",
-            "seo": "SEO优化：增加关键词密度，优化标题和段落结构",
-            "engagement": "互动优化：增加互动元素，提升用户参与度"
-        }
-        
-        platform_rule = platform_rules.get(platform, "通用平台优化")
-        optimization_rule = optimization_rules.get(optimization_type, "标准优化")
-        
-        prompt = f"""请对以下文章内容进行优化，要求：
-
-平台特点：{platform_rule}
-优化类型：{optimization_rule}
-
-优化要求：
-1. 保持原文核心观点和信息不变
-2. 优化语言表达，使其更符合平台特色
-3. 调整段落结构，提升阅读体验
-4. 增加适当的过渡词和连接词
-5. 确保内容原创性，避免AI痕迹过重
-
-"""
-        
-        if title:
-            prompt += f"原标题：{title}\n\n"
-        
-        prompt += f"原文内容：\n{content}\n\n请直接输出优化后的内容，不要添加任何解释或说明。"
-        
-        return prompt
-
-
-# Service instance
-_llm_service = None
-
-def get_llm_service() -> LLMAPIService:
-    """Get LLM service instance."""
-    global _llm_service
-    if _llm_service is None:
-        _llm_service = LLMAPIService()
-    return _llm_service
+"""
+Large Language Model API service integration.
+"""
+
+import asyncio
+import logging
+import json
+import os
+import random
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from hashlib import blake2b
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from datetime import datetime
+import aiohttp
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# orjson parses bytes directly; its JSONDecodeError subclasses json.JSONDecodeError
+if ORJSON_AVAILABLE:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+# SSE framing tokens, matched on raw bytes
+_SSE_DATA_PREFIX = b'data:'
+_SSE_DATA_PREFIX_LEN = len(_SSE_DATA_PREFIX)
+_SSE_DONE = b'[DONE]'
+_SSE_DONE_MAX_LEN = len(_SSE_DONE) + 2
+
+# Transport-level timeouts, whichever HTTP client is in use
+_TIMEOUT_ERRORS = (asyncio.TimeoutError, httpx.TimeoutException) if HTTPX_AVAILABLE else (asyncio.TimeoutError,)
+
+# Transient failures worth retrying over the warm connection pool
+_RETRY_ERRORS = _TIMEOUT_ERRORS + (aiohttp.ClientError,) + ((httpx.TransportError,) if HTTPX_AVAILABLE else ())
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+# Prompt lookup tables
+_LANG_NAMES = {
+    "en": "英文",
+    "zh": "中文",
+    "ja": "日文",
+    "ko": "韩文"
+}
+
+_PLATFORM_RULES = {
+    "toutiao": "今日头条平台特点：标题要吸引眼球，内容要有争议性和话题性，适合大众阅读",
+    "weixin": "微信公众号平台特点：内容要有价值，标题要精准，适合分享传播",
+    "zhihu": "知乎平台特点：内容要专业深入，逻辑清晰，有知识价值",
+    "xiaohongshu": "小红书平台特点：内容要生活化，有实用价值，适合年轻用户"
+}
+
+_OPTIMIZATION_RULES = {
+    "standard": "标准优化：提升可读性，优化结构，增强吸引力",
+    "seo": "SEO优化：增加关键词密度，优化标题和段落结构",
+    "engagement": "互动优化：增加互动元素，提升用户参与度"
+}
+
+# 目标长度映射
+_LENGTH_MAPPING = {
+    "mini": {"words": "300-500", "description": "简短文章"},
+    "short": {"words": "500-800", "description": "短篇文章"},
+    "medium": {"words": "800-1500", "description": "中等长度文章"},
+    "long": {"words": "1500-3000", "description": "长篇文章"}
+}
+
+# Static parts of the default topic-creation prompt
+_TOPIC_PROMPT_INTRO = "你是一位专业的内容创作专家。请根据以下要求创作一篇高质量的文章：\n\n"
+_TOPIC_PROMPT_CHECKLIST = (
+    "\n\n"
+    "请确保文章：\n"
+    "1. 内容原创且有深度\n"
+    "2. 结构清晰，逻辑性强\n"
+    "3. 语言流畅，符合中文表达习惯\n"
+    "4. 包含实用价值和见解\n"
+    "5. 字数严格控制在 {words} 字之间\n"
+    "\n"
+    "请直接输出文章内容，不需要额外的说明。"
+)
+
+
+def _to_int(value: Any) -> int:
+    """Coerce an integral value, rejecting fractions instead of truncating them."""
+    if isinstance(value, bool):
+        raise TypeError("bool is not an integer parameter")
+    if isinstance(value, int):
+        return value
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"{value!r} is not an integer")
+    return int(number)
+
+
+def _to_bool(value: Any) -> bool:
+    """Coerce a flag; strings must spell out true/false or 1/0."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        flag = value.strip().lower()
+        if flag in ("true", "1"):
+            return True
+        if flag in ("false", "0"):
+            return False
+    raise ValueError(f"{value!r} is not a boolean")
+
+
+# Overridable API parameters: (coercion, minimum, maximum)
+_API_PARAM_RULES: Dict[str, Tuple[Callable[[Any], Any], Optional[float], Optional[float]]] = {
+    "temperature": (float, 0.0, 2.0),
+    "max_tokens": (_to_int, 1, None),
+    "top_p": (float, 0.0, 1.0),
+    "frequency_penalty": (float, -2.0, 2.0),
+    "presence_penalty": (float, -2.0, 2.0),
+    "stream": (_to_bool, None, None)
+}
+
+
+def _validate_api_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Pick the known API parameters out of params, coerced and range-checked.
+    
+    Unknown keys are ignored and None means "use the default", as before.
+    """
+    overrides = {}
+    for key, value in params.items():
+        rule = _API_PARAM_RULES.get(key)
+        if rule is None or value is None:
+            continue
+        coerce, minimum, maximum = rule
+        try:
+            value = coerce(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid API parameter {key}={value!r}")
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            raise ValueError(f"API parameter {key}={value} out of range [{minimum}, {maximum}]")
+        overrides[key] = value
+    return overrides
+
+
+def _batch_titles(contents: List[str], titles: Optional[List[str]]) -> List[str]:
+    """Titles for a batch call, one per content; missing titles mean none at all."""
+    if not titles:
+        return [""] * len(contents)
+    if len(titles) != len(contents):
+        raise ValueError(f"Got {len(titles)} titles for {len(contents)} contents")
+    return titles
+
+
+def _looks_like_title(line: str) -> bool:
+    """Simple heuristic to detect if a first line is a title."""
+    return len(line) < 100 and not line.endswith('。') and not line.endswith('.')
+
+
+@lru_cache(maxsize=64)
+def _translation_preamble(source_lang: str, target_lang: str) -> str:
+    """Build the static instruction header of a translation prompt."""
+    source_name = _LANG_NAMES.get(source_lang, source_lang)
+    target_name = _LANG_NAMES.get(target_lang, target_lang)
+    
+    return f"""请将以下{source_name}文章翻译成{target_name}，要求：
+
+1. 保持原文的语义和语调
+2. 使用自然流畅的{target_name}表达
+3. 保留专业术语的准确性
+4. 适当调整句式以符合{target_name}阅读习惯
+5. 保持段落结构不变
+
+"""
+
+
+@lru_cache(maxsize=64)
+def _optimization_preamble(platform: str, optimization_type: str) -> str:
+    """Build the static instruction header of an optimization prompt."""
+    platform_rule = _PLATFORM_RULES.get(platform, "通用平台优化")
+    optimization_rule = _OPTIMIZATION_RULES.get(optimization_type, "标准优化")
+    
+    return f"""请对以下文章内容进行优化，要求：
+
+平台特点：{platform_rule}
+优化类型：{optimization_rule}
+
+优化要求：
+1. 保持原文核心观点和信息不变
+2. 优化语言表达，使其更符合平台特色
+3. 调整段落结构，提升阅读体验
+4. 增加适当的过渡词和连接词
+5. 确保内容原创性，避免AI痕迹过重
+
+"""
+
+
+
+@dataclass
+class LLMResponse:
+    """LLM API response."""
+    content: str
+    success: bool = True
+    error: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+    model: Optional[str] = None
+    finish_reason: Optional[str] = None
+
+
+def _render_translation_prompt(content: str, title: str, source_lang: str, target_lang: str) -> str:
+    """Build translation prompt (module-level so it can run in a process pool)."""
+    prompt = _translation_preamble(source_lang, target_lang)
+    
+    if title:
+        prompt += f"文章标题：{title}\n\n"
+    
+    return prompt + f"文章内容：\n{content}\n\n请直接输出翻译结果，不要添加任何解释或说明。"
+
+
+def _render_optimization_prompt(content: str, title: str, platform: str, optimization_type: str) -> str:
+    """Build content optimization prompt (module-level so it can run in a process pool)."""
+    prompt = _optimization_preamble(platform, optimization_type)
+    
+    if title:
+        prompt += f"原标题：{title}\n\n"
+    
+    return prompt + f"原文内容：\n{content}\n\n请直接输出优化后的内容，不要添加任何解释或说明。"
+
+
+class _RetryableStatus(Exception):
+    """Raised for HTTP statuses that should be retried."""
+
+    def __init__(self, status: int, retry_after: Optional[float], detail: str):
+        super().__init__(f"API request failed: {status} - {detail}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _StreamResponse(NamedTuple):
+    """Transport-neutral view of an open HTTP response."""
+    status: int
+    content_type: str
+    headers: Any
+    iter_bytes: Callable[[], AsyncIterator[bytes]]
+    read: Callable[[], Awaitable[bytes]]
+
+    async def text(self) -> str:
+        return (await self.read()).decode('utf-8', errors='replace')
+
+
+class LLMAPIService:
+    """Large Language Model API service.
+    
+    Connection pool limits can be overridden with the ``LLM_MAX_CONNECTIONS``,
+    ``LLM_MAX_PER_HOST`` and ``LLM_KEEPALIVE_TIMEOUT`` environment variables.
+    Setting ``LLM_HTTP2=1`` (or ``http2=True``) sends requests through an
+    HTTP/2 ``httpx.AsyncClient`` when httpx is installed, multiplexing
+    concurrent calls over fewer connections. For backends that accept several
+    conversations in one request, ``LLM_SUPPORTS_BATCH=1`` (or
+    ``supports_batch=True``) packs up to ``LLM_BATCH_SIZE`` prompts per POST.
+    """
+    
+    # Prompt response cache (only deterministic or explicitly cached calls)
+    PROMPT_CACHE_SIZE = 1024
+    PROMPT_CACHE_TTL = 3600.0
+    
+    # Prompts for content at least this long are rendered off the event loop
+    PROMPT_OFFLOAD_THRESHOLD = 64 * 1024
+    
+    # Retries for transient failures (timeouts, connection errors, 429/5xx)
+    MAX_ATTEMPTS = 4
+    RETRY_BACKOFF_BASE = 0.5
+    RETRY_BACKOFF_MAX = 10.0
+    RETRY_AFTER_MAX = 60.0
+    
+    # Streamed deltas are coalesced and handed upstream at most this often / this large
+    SSE_FLUSH_INTERVAL = 0.1
+    SSE_FLUSH_SIZE = 4096
+    
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+        supports_batch: Optional[bool] = None,
+        batch_size: Optional[int] = None,
+        prompt_executor: Optional[Executor] = None
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.base_url = "http://localhost:8000/v1/chat/completions"
+        self.api_key = "sk-dummy-f4689c69ad5746a8bb5b5e897b4033c7"
+        self.timeout = aiohttp.ClientTimeout(total=300, connect=30, sock_read=60)  # 5 minutes total, 30s connect, 60s read
+        self.default_model = "Claude-4-Sonnet"  # 使用Claude-4-Sonnet模型
+        # 可配置的API参数模板，调用时只覆盖传入的参数
+        # Claude的最大tokens限制约为200k，设置为较大值以避免截断
+        self._base_payload = {
+            "temperature": 0.7,
+            "max_tokens": 100000,
+            "top_p": 1.0,
+            "frequency_penalty": 0.0,
+            "presence_penalty": 0.0,
+            # 默认请求流式输出，边接收边解析
+            "stream": True
+        }
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        # Connection pool sizing (constructor args take precedence over env vars)
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "200"))
+        self.max_per_host = max_per_host or int(os.getenv("LLM_MAX_PER_HOST", "100"))
+        self.keepalive_timeout = keepalive_timeout or float(os.getenv("LLM_KEEPALIVE_TIMEOUT", "60"))
+        if http2 is None:
+            http2 = os.getenv("LLM_HTTP2", "").lower() in ("1", "true", "yes")
+        if http2 and not HTTPX_AVAILABLE:
+            self.logger.warning("LLM_HTTP2 requested but httpx is not installed; using aiohttp")
+        self.use_http2 = http2 and HTTPX_AVAILABLE
+        # Server-side batching (messages as a list of conversations)
+        if supports_batch is None:
+            supports_batch = os.getenv("LLM_SUPPORTS_BATCH", "").lower() in ("1", "true", "yes")
+        self.supports_batch = supports_batch
+        self.batch_size = batch_size or int(os.getenv("LLM_BATCH_SIZE", "16"))
+        # Executor for rendering large prompts (None = the loop's default thread pool;
+        # a ProcessPoolExecutor also works since the renderers are module-level)
+        self.prompt_executor = prompt_executor
+        # Pooled HTTP session/client, bound to the loop that owns the pool
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._http2_client = None
+        self._pool_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._response_cache: "OrderedDict[Tuple, Tuple[float, LLMResponse]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+    
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create an aiohttp session with the configured pool limits."""
+        # No enable_cleanup_closed: idle sockets are pool-managed and closed with the session
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_per_host,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        return aiohttp.ClientSession(
+            timeout=self.timeout,
+            connector=connector,
+            headers=self.headers
+        )
+    
+    def _create_http2_client(self) -> "httpx.AsyncClient":
+        """Create an HTTP/2 httpx client with the configured pool limits."""
+        return httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_per_host,
+                keepalive_expiry=self.keepalive_timeout
+            ),
+            timeout=httpx.Timeout(300.0, connect=30.0, read=60.0)
+        )
+    
+    def _owns_pool(self) -> bool:
+        """Whether the running loop owns the pooled session.
+        
+        The first loop to use the service (normally the app's, via startup())
+        owns the pool; it is handed over only once that loop has closed.
+        Other loops (e.g. background processing threads) use short-lived
+        sessions, since a session cannot outlive or cross its loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._pool_loop is None or self._pool_loop.is_closed():
+            self._pool_loop = loop
+            self._session = None
+            self._http2_client = None
+        return self._pool_loop is loop
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it lazily."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+    
+    async def _get_http2_client(self) -> "httpx.AsyncClient":
+        """Get the pooled HTTP/2 client, creating it lazily."""
+        if self._http2_client is None or self._http2_client.is_closed:
+            self._http2_client = self._create_http2_client()
+        return self._http2_client
+    
+    @asynccontextmanager
+    async def _post(self, body: bytes) -> AsyncIterator[_StreamResponse]:
+        """POST a pre-serialized JSON body and yield the open response."""
+        pooled = self._owns_pool()
+        if self.use_http2:
+            client = await self._get_http2_client() if pooled else self._create_http2_client()
+            try:
+                async with client.stream("POST", self.base_url, content=body) as response:
+                    yield _StreamResponse(
+                        response.status_code,
+                        response.headers.get('content-type', ''),
+                        response.headers,
+                        response.aiter_bytes,
+                        response.aread
+                    )
+            finally:
+                if not pooled:
+                    await client.aclose()
+        else:
+            # Reuse the pooled session so keep-alive connections carry over between calls
+            session = await self._get_session() if pooled else self._create_session()
+            try:
+                async with session.post(self.base_url, data=body) as response:
+                    yield _StreamResponse(
+                        response.status,
+                        response.headers.get('content-type', ''),
+                        response.headers,
+                        response.content.iter_any,
+                        response.read
+                    )
+            finally:
+                if not pooled:
+                    await session.close()
+    
+    async def startup(self):
+        """Open the connection pool on the running (application) event loop."""
+        self._pool_loop = asyncio.get_running_loop()
+        if self.use_http2:
+            await self._get_http2_client()
+        else:
+            await self._get_session()
+        self.logger.info("LLM service connection pool ready")
+    
+    async def shutdown(self):
+        """Release HTTP resources at application shutdown."""
+        await self.close()
+    
+    async def close(self):
+        """Close the pooled HTTP session and client."""
+        session = self._session
+        self._session = None
+        if session is not None and not session.closed:
+            await session.close()
+        
+        client = self._http2_client
+        self._http2_client = None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+    
+    async def __aenter__(self) -> "LLMAPIService":
+        await self.startup()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.shutdown()
+        
+    async def translate_content(
+        self, 
+        content: str, 
+        title: str = "", 
+        source_language: str = "en", 
+        target_language: str = "zh",
+        custom_prompt: str = ""
+    ) -> LLMResponse:
+        """
+        Translate article content.
+        
+        Args:
+            content: Content to translate
+            title: Article title
+            source_language: Source language code
+            target_language: Target language code
+            custom_prompt: Custom translation prompt
+            
+        Returns:
+            LLMResponse with translated content
+        """
+        try:
+            self.logger.info(f"Starting content translation from {source_language} to {target_language}")
+            
+            # Build translation prompt
+            if custom_prompt:
+                prompt = custom_prompt
+            else:
+                prompt = await self._render_prompt(
+                    _render_translation_prompt, content, title, source_language, target_language
+                )
+            
+            # Call LLM API
+            response = await self._call_api(prompt)
+            
+            if response.success:
+                self.logger.info("Content translation completed successfully")
+            else:
+                self.logger.error(f"Content translation failed: {response.error}")
+            
+            return response
+            
+        except Exception as e:
+            self.logger.error(f"Translation error: {e}")
+            return LLMResponse(
+                content="",
+                success=False,
+                error=str(e)
+            )
+    
+    async def optimize_content(
+        self, 
+        content: str, 
+        title: str = "", 
+        platform: str = "toutiao",
+        optimization_type: str = "standard",
+        custom_prompt: str = ""
+    ) -> LLMResponse:
+        """
+        Optimize article content for specific platform.
+        
+        Args:
+            content: Content to optimize
+            title: Article title
+            platform: Target platform (toutiao, weixin, etc.)
+            optimization_type: Type of optimization (standard, seo, engagement)
+            custom_prompt: Custom optimization prompt
+            
+        Returns:
+            LLMResponse with optimized content
+        """
+        try:
+            self.logger.info(f"Starting content optimization for platform: {platform}")
+            
+            # Build optimization prompt
+            if custom_prompt:
+                prompt = custom_prompt
+            else:
+                prompt = await self._render_prompt(
+                    _render_optimization_prompt, content, title, platform, optimization_type
+                )
+            
+            # Call LLM API
+            response = await self._call_api(prompt)
+            
+            if response.success:
+                self.logger.info("Content optimization completed successfully")
+            else:
+                self.logger.error(f"Content optimization failed: {response.error}")
+            
+            return response
+            
+        except Exception as e:
+            self.logger.error(f"Optimization error: {e}")
+            return LLMResponse(
+                content="",
+                success=False,
+                error=str(e)
+            )
+
+    async def batch_call(
+        self,
+        prompts: List[str],
+        concurrency: Optional[int] = None,
+        model: str = None,
+        **kwargs
+    ) -> List[LLMResponse]:
+        """
+        Call the LLM API for many prompts concurrently.
+        
+        Args:
+            prompts: Prompts to send
+            concurrency: Maximum in-flight requests (defaults to the per-host pool limit)
+            model: Model override
+            **kwargs: API parameters passed to every call
+            
+        Returns:
+            LLMResponse list in the same order as prompts
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.max_per_host)
+        
+        async def _one(prompt: str) -> LLMResponse:
+            async with semaphore:
+                return await self._call_api(prompt, model, **kwargs)
+        
+        results = await asyncio.gather(*(_one(p) for p in prompts), return_exceptions=True)
+        return [
+            r if isinstance(r, LLMResponse) else LLMResponse(content="", success=False, error=str(r))
+            for r in results
+        ]
+    
+    async def _call_api_batch(
+        self,
+        prompts: List[str],
+        model: str = None,
+        concurrency: Optional[int] = None,
+        **kwargs
+    ) -> List[LLMResponse]:
+        """
+        Send prompts packed into server-side batches when the backend supports it.
+        
+        Falls back to concurrent single-prompt calls (batch_call) when batching
+        is disabled or a batch request fails.
+        """
+        if not self.supports_batch or len(prompts) < 2:
+            return await self.batch_call(prompts, concurrency, model, **kwargs)
+        
+        groups = [prompts[i:i + self.batch_size] for i in range(0, len(prompts), self.batch_size)]
+        semaphore = asyncio.Semaphore(concurrency or self.max_per_host)
+        
+        async def _group(group: List[str]) -> List[LLMResponse]:
+            async with semaphore:
+                results = await self._request_batch(group, model, **kwargs)
+            if results is None:
+                return await self.batch_call(group, concurrency, model, **kwargs)
+            return results
+        
+        grouped = await asyncio.gather(*(_group(g) for g in groups))
+        return [r for results in grouped for r in results]
+    
+    async def _request_batch(self, prompts: List[str], model: str = None, **kwargs) -> Optional[List[LLMResponse]]:
+        """POST one batched request; returns None if the backend rejected it."""
+        payload = self._build_payload("", model, **kwargs)
+        payload["messages"] = [[{"role": "user", "content": prompt}] for prompt in prompts]
+        payload["stream"] = False
+        
+        try:
+            async with self._post(_json_dumps(payload)) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    self.logger.warning(f"⚠️ 批量请求失败，改为逐条调用: {response.status} - {error_text[:200]}")
+                    return None
+                data = _json_loads(await response.read())
+        except Exception as e:
+            self.logger.warning(f"⚠️ 批量请求异常，改为逐条调用: {e}")
+            return None
+        
+        results = [
+            LLMResponse(content="", success=False, error="No choice returned for prompt in batch")
+            for _ in prompts
+        ]
+        for position, choice in enumerate(data.get("choices", [])):
+            index = choice.get("index", position)
+            if 0 <= index < len(results):
+                results[index] = self._parse_api_response({
+                    "choices": [choice],
+                    "usage": data.get("usage", {}),
+                    "model": data.get("model", "")
+                })
+        return results
+    
+    async def translate_many(
+        self,
+        contents: List[str],
+        titles: Optional[List[str]] = None,
+        source_language: str = "en",
+        target_language: str = "zh",
+        concurrency: Optional[int] = None
+    ) -> List[LLMResponse]:
+        """Translate several articles concurrently."""
+        titles = _batch_titles(contents, titles)
+        prompts = await asyncio.gather(*(
+            self._render_prompt(_render_translation_prompt, content, title, source_language, target_language)
+            for content, title in zip(contents, titles)
+        ))
+        self.logger.info(f"Starting batch translation of {len(prompts)} articles")
+        return await self._call_api_batch(prompts, concurrency=concurrency)
+    
+    async def optimize_many(
+        self,
+        contents: List[str],
+        titles: Optional[List[str]] = None,
+        platform: str = "toutiao",
+        optimization_type: str = "standard",
+        concurrency: Optional[int] = None
+    ) -> List[LLMResponse]:
+        """Optimize several articles concurrently."""
+        titles = _batch_titles(contents, titles)
+        prompts = await asyncio.gather(*(
+            self._render_prompt(_render_optimization_prompt, content, title, platform, optimization_type)
+            for content, title in zip(contents, titles)
+        ))
+        self.logger.info(f"Starting batch optimization of {len(prompts)} articles for platform: {platform}")
+        return await self._call_api_batch(prompts, concurrency=concurrency)
+
+    async def create_content_by_topic(
+        self,
+        topic: str,
+        keywords: list = None,
+        requirements: str = "",
+        custom_prompt: str = None,
+        model: str = None,
+        target_length: str = "mini",
+        on_title: Optional[Callable[[str], Any]] = None,
+        **api_params
+    ) -> LLMResponse:
+        """
+        Create content based on topic using LLM API.
+        
+        When on_title is given the article is streamed and the callback receives
+        the detected title as soon as the first line is complete.
+        """
+        try:
+            self.logger.info(f"🎨 开始主题内容创作: {topic}")
+            self.logger.info(f"📏 目标长度: {target_length}")
+
+            length_info = _LENGTH_MAPPING.get(target_length, _LENGTH_MAPPING["mini"])
+            self.logger.info(f"📊 字数要求: {length_info['words']} 字 ({length_info['description']})")
+
+            if custom_prompt:
+                # 处理自定义提示词，添加长度要求
+                self.logger.info("📝 使用自定义创作提示词")
+
+                # 检查是否包含长度变量占位符
+                if "{target_length}" in custom_prompt:
+                    prompt = custom_prompt.format(target_length=length_info['words'])
+                    self.logger.info("✅ 已填充目标长度变量")
+                elif "字数" not in custom_prompt and "长度" not in custom_prompt:
+                    # 如果自定义提示词没有长度要求，添加长度指导
+                    prompt = custom_prompt + f"\n\n**字数要求：** 请控制文章字数在 {length_info['words']} 字之间。"
+                    self.logger.info("✅ 已添加字数要求到自定义提示词")
+                else:
+                    prompt = custom_prompt
+                    self.logger.info("ℹ️  自定义提示词已包含长度要求")
+            else:
+                # Build default creation prompt with target length
+                self.logger.info("📝 使用默认创作提示词")
+                words = length_info['words']
+                prompt = _TOPIC_PROMPT_INTRO + f"主题：{topic}"
+
+                if keywords:
+                    prompt += f"\n关键词：{', '.join(keywords)}"
+
+                if requirements:
+                    prompt += f"\n创作要求：{requirements}"
+
+                # 添加字数要求
+                prompt += f"\n字数要求：{words} 字" + _TOPIC_PROMPT_CHECKLIST.format(words=words)
+
+            # Call LLM API with configurable parameters
+            if on_title is not None:
+                result = await self._stream_topic_content(prompt, model, on_title, **api_params)
+            else:
+                result = await self._call_api(prompt, model, **api_params)
+
+            if result.success:
+                self.logger.info("✅ 主题内容创作成功")
+                self.logger.info(f"📝 创作内容长度: {len(result.content)} 字符")
+
+                # Try to extract title from content if possible; only the
+                # first line is inspected, so avoid splitting the whole article
+                text = result.content.strip()
+                newline = text.find('\n')
+                if newline != -1:
+                    potential_title = text[:newline].strip()
+                    if _looks_like_title(potential_title):
+                        result.title = potential_title
+                        result.content = text[newline + 1:].strip()
+                        self.logger.info(f"📰 提取到标题: {potential_title}")
+
+            return result
+
+        except Exception as e:
+            self.logger.error(f"💥 主题内容创作异常: {str(e)}")
+            return LLMResponse(
+                success=False,
+                content="",
+                message=f"主题内容创作失败: {str(e)}"
+            )
+
+    async def _call_api(self, prompt: str, model: str = None, cache: Optional[bool] = None, **kwargs) -> LLMResponse:
+        """
+        Call the LLM API, serving repeated prompts from the response cache.
+        
+        Caching applies to deterministic calls (temperature 0) by default;
+        pass cache=True to cache sampled calls or cache=False to bypass it.
+        Concurrent identical calls share a single in-flight request.
+        """
+        # Reject bad parameters before any network work; normalized values
+        # also make equivalent calls share a cache key
+        try:
+            kwargs = _validate_api_params(kwargs)
+        except ValueError as e:
+            self.logger.error(f"❌ API参数无效: {e}")
+            return LLMResponse(content="", success=False, error=str(e))
+        
+        if cache is None:
+            cache = kwargs.get('temperature', self._base_payload['temperature']) <= 0
+        if not cache:
+            return await self._request_api(prompt, model, **kwargs)
+        
+        key = (
+            model or self.default_model,
+            blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest(),
+            tuple(sorted(kwargs.items()))
+        )
+        
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < self.PROMPT_CACHE_TTL:
+                self._response_cache.move_to_end(key)
+                self.logger.info("♻️ 命中提示词缓存，跳过API调用")
+                return replace(cached[1])
+            del self._response_cache[key]
+        
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get(key)
+        if future is None or future.get_loop() is not loop:
+            future = loop.create_future()
+            self._inflight[key] = future
+            try:
+                response = await self._request_api(prompt, model, **kwargs)
+                if response.success:
+                    self._response_cache[key] = (time.monotonic(), replace(response))
+                    while len(self._response_cache) > self.PROMPT_CACHE_SIZE:
+                        self._response_cache.popitem(last=False)
+                future.set_result(response)
+            except BaseException as e:
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure doesn't log a warning
+                future.exception()
+                raise
+            finally:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            return response
+        
+        return replace(await asyncio.shield(future))
+
+    def _build_payload(self, prompt: str, model: str = None, **kwargs) -> Dict[str, Any]:
+        """
+        Build the chat completion request body from the cached template.
+        
+        Raises:
+            ValueError: If an API parameter is not a number or is out of range
+        """
+        return {
+            "model": model or self.default_model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            **self._base_payload,
+            **_validate_api_params(kwargs)
+        }
+
+    async def stream_call(self, prompt: str, model: str = None, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream generated content chunks as they arrive.
+        
+        Raises:
+            RuntimeError: If the API rejects the request
+        """
+        kwargs['stream'] = True
+        payload = self._build_payload(prompt, model, **kwargs)
+        async with self._post(_json_dumps(payload)) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                self.logger.error(f"❌ API请求失败，状态码: {response.status}")
+                raise RuntimeError(f"API request failed: {response.status} - {error_text}")
+
+            if 'text/event-stream' in response.content_type:
+                async for chunk in self._iter_sse(response.iter_bytes()):
+                    yield chunk
+            else:
+                # Backend ignored the stream flag; emit the whole message at once
+                result = self._parse_api_response(_json_loads(await response.read()))
+                if not result.success:
+                    raise RuntimeError(result.error)
+                if result.content:
+                    yield result.content
+
+    async def _stream_topic_content(
+        self,
+        prompt: str,
+        model: Optional[str],
+        on_title: Callable[[str], Any],
+        **api_params
+    ) -> LLMResponse:
+        """Stream a topic article, reporting the likely title as soon as the first line arrives."""
+        parts: List[str] = []
+        title_pending = True
+        try:
+            async for chunk in self.stream_call(prompt, model, **api_params):
+                parts.append(chunk)
+                if title_pending:
+                    head = ''.join(parts).lstrip()
+                    newline = head.find('\n')
+                    if newline != -1:
+                        title_pending = False
+                        potential_title = head[:newline].strip()
+                        if _looks_like_title(potential_title):
+                            on_title(potential_title)
+        except Exception as e:
+            self.logger.error(f"💥 流式创作失败: {e}")
+            return LLMResponse(content="", success=False, error=str(e))
+
+        return LLMResponse(content=''.join(parts), success=True, error="")
+
+    async def _request_api(self, prompt: str, model: str = None, **kwargs) -> LLMResponse:
+        """Call the LLM API with improved error handling and configurable parameters."""
+        try:
+            self.logger.info("🚀 开始调用LLM API: %s (模型: %s, 提示词长度: %d 字符)",
+                             self.base_url, model or self.default_model, len(prompt))
+
+            # 完整提示词只在DEBUG级别输出
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("📤 发送给LLM的完整提示词内容:\n%s", prompt)
+
+            payload = self._build_payload(prompt, model, **kwargs)
+
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "📊 请求参数: temperature=%s, max_tokens=%s, top_p=%s, "
+                    "frequency_penalty=%s, presence_penalty=%s",
+                    payload['temperature'], payload['max_tokens'], payload['top_p'],
+                    payload['frequency_penalty'], payload['presence_penalty']
+                )
+
+            # Serialize once; retries resend the same bytes
+            body = _json_dumps(payload)
+
+            for attempt in range(1, self.MAX_ATTEMPTS + 1):
+                retry = attempt < self.MAX_ATTEMPTS
+                try:
+                    return await self._post_once(body, retry)
+                except _RetryableStatus as e:
+                    delay = e.retry_after if e.retry_after is not None else self._backoff_delay(attempt)
+                    self.logger.warning(f"🔁 API返回 {e.status}，{delay:.1f}s 后重试 ({attempt}/{self.MAX_ATTEMPTS})")
+                except _RETRY_ERRORS as e:
+                    if not retry:
+                        raise
+                    delay = self._backoff_delay(attempt)
+                    self.logger.warning(f"🔁 API请求出错 ({type(e).__name__}: {e})，{delay:.1f}s 后重试 ({attempt}/{self.MAX_ATTEMPTS})")
+                await asyncio.sleep(delay)
+
+        except asyncio.CancelledError:
+            self.logger.error("⚠️ API调用被取消")
+            return LLMResponse(
+                content="",
+                success=False,
+                error="API call was cancelled"
+            )
+        except _TIMEOUT_ERRORS:
+            self.logger.error("⏰ API调用超时")
+            return LLMResponse(
+                content="",
+                success=False,
+                error="API call timed out"
+            )
+        except Exception as e:
+            self.logger.error(f"💥 API调用异常: {e}")
+            import traceback
+            self.logger.error(f"💥 异常堆栈: {traceback.format_exc()}")
+            return LLMResponse(
+                content="",
+                success=False,
+                error=str(e)
+            )
+
+    async def _post_once(self, body: bytes, retry: bool) -> LLMResponse:
+        """
+        Send one request and parse the response.
+        
+        Raises:
+            _RetryableStatus: On 429/5xx when another attempt is allowed
+        """
+        async with self._post(body) as response:
+            self.logger.debug("📡 收到响应，状态码: %s", response.status)
+
+            if response.status == 200:
+                # Check content type to determine how to parse response
+                content_type = response.content_type
+                self.logger.debug("📋 响应内容类型: %s", content_type)
+
+                if 'text/event-stream' in content_type:
+                    # Handle Server-Sent Events (SSE) streaming response
+                    self.logger.debug("🌊 检测到流式响应，开始处理SSE数据...")
+                    content = await self._parse_sse_response(response)
+                    return LLMResponse(
+                        content=content,
+                        success=True,
+                        error=""
+                    )
+                else:
+                    # Handle standard JSON response
+                    data = _json_loads(await response.read())
+                    self.logger.info("✅ API调用成功，正在解析JSON响应...")
+                    return self._parse_api_response(data)
+            else:
+                error_text = await response.text()
+                if retry and response.status in _RETRY_STATUSES:
+                    raise _RetryableStatus(response.status, self._retry_after(response.headers), error_text)
+                self.logger.error(f"❌ API请求失败，状态码: {response.status}")
+                self.logger.error(f"💬 错误详情: {error_text}")
+                return LLMResponse(
+                    content="",
+                    success=False,
+                    error=f"API request failed: {response.status} - {error_text}"
+                )
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.RETRY_BACKOFF_MAX, self.RETRY_BACKOFF_BASE * 2 ** attempt))
+
+    def _retry_after(self, headers) -> Optional[float]:
+        """Seconds requested by a Retry-After header, if given as a number."""
+        try:
+            return min(float(headers.get('Retry-After')), self.RETRY_AFTER_MAX)
+        except (TypeError, ValueError):
+            return None
+
+    def _drain_sse_events(self, buffer: bytearray) -> Tuple[List[str], bool]:
+        """Pop complete SSE events off the buffer; return their content and whether [DONE] was seen."""
+        contents = []
+        start = 0
+        try:
+            while True:
+                end = buffer.find(b'\n\n', start)
+                if end == -1:
+                    return contents, False
+                # Slice events in place and compact the buffer once at the end
+                event = buffer[start:end]
+                start = end + 2
+
+                for line in event.split(b'\n'):
+                    if not line.startswith(_SSE_DATA_PREFIX):
+                        continue
+                    # JSON tolerates the optional leading space; only the short
+                    # [DONE] sentinel needs trimming before comparison
+                    payload = line[_SSE_DATA_PREFIX_LEN:]
+
+                    if len(payload) <= _SSE_DONE_MAX_LEN and payload.strip() == _SSE_DONE:
+                        self.logger.info("✅ SSE流结束")
+                        return contents, True
+
+                    try:
+                        data = _json_loads(payload)
+                    except json.JSONDecodeError:
+                        self.logger.debug("⚠️ 跳过非JSON行: %r", line[:100])
+                        continue
+
+                    # Extract content from the streaming response
+                    if 'choices' in data and len(data['choices']) > 0:
+                        choice = data['choices'][0]
+                        if 'delta' in choice and 'content' in choice['delta']:
+                            content_chunk = choice['delta']['content']
+                        elif 'message' in choice and 'content' in choice['message']:
+                            # Handle non-streaming format
+                            content_chunk = choice['message']['content']
+                        else:
+                            continue
+                        if content_chunk:
+                            contents.append(content_chunk)
+        finally:
+            del buffer[:start]
+
+    async def _iter_sse(self, byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """
+        Yield content from a Server-Sent Events (SSE) byte stream.
+        
+        Deltas are coalesced and flushed every SSE_FLUSH_INTERVAL seconds or
+        once SSE_FLUSH_SIZE characters are pending, instead of per token.
+        """
+        loop = asyncio.get_running_loop()
+        buffer = bytearray()
+        pending: List[str] = []
+        pending_size = 0
+        last_flush = loop.time()
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        done = False
+
+        # Take whatever the socket has and split complete events on the blank line
+        async for chunk in byte_chunks:
+            # Normalize CRLF framing; JSON payloads never carry raw CR
+            buffer.extend(chunk.replace(b'\r', b'') if b'\r' in chunk else chunk)
+            contents, done = self._drain_sse_events(buffer)
+            if contents:
+                pending.extend(contents)
+                pending_size += sum(map(len, contents))
+
+            now = loop.time()
+            if pending and (done or pending_size >= self.SSE_FLUSH_SIZE or now - last_flush >= self.SSE_FLUSH_INTERVAL):
+                if debug:
+                    self.logger.debug("📝 收到内容块: %d 段, %d 字符", len(pending), pending_size)
+                yield ''.join(pending)
+                pending.clear()
+                pending_size = 0
+                last_flush = now
+            if done:
+                return
+
+        # Flush a trailing event that was not blank-line terminated
+        if buffer.strip():
+            buffer.extend(b'\n\n')
+            contents, _ = self._drain_sse_events(buffer)
+            pending.extend(contents)
+        if pending:
+            yield ''.join(pending)
+
+    async def _parse_sse_response(self, response: _StreamResponse) -> str:
+        """Parse Server-Sent Events (SSE) streaming response."""
+        try:
+            self.logger.info("🔄 开始解析SSE流式响应...")
+            full_content = ''.join([chunk async for chunk in self._iter_sse(response.iter_bytes())])
+            self.logger.info(f"✅ SSE解析完成，总内容长度: {len(full_content)} 字符")
+            return full_content
+
+        except Exception as e:
+            self.logger.error(f"💥 SSE解析异常: {e}")
+            # Fallback: try to read as plain text
+            try:
+                text_content = await response.text()
+                self.logger.info("🔄 尝试作为纯文本读取...")
+                return text_content
+            except Exception as fallback_e:
+                self.logger.error(f"💥 纯文本读取也失败: {fallback_e}")
+                return ""
+
+    def _parse_api_response(self, data: Dict[str, Any]) -> LLMResponse:
+        """Parse API response."""
+        try:
+            choices = data.get("choices", [])
+            if not choices:
+                return LLMResponse(
+                    content="",
+                    success=False,
+                    error="No choices in API response"
+                )
+            
+            choice = choices[0]
+            message = choice.get("message", {})
+            content = message.get("content", "").strip()
+            
+            usage = data.get("usage", {})
+            model = data.get("model", "")
+            finish_reason = choice.get("finish_reason", "")
+            
+            return LLMResponse(
+                content=content,
+                success=True,
+                usage=usage,
+                model=model,
+                finish_reason=finish_reason
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error parsing API response: {e}")
+            return LLMResponse(
+                content="",
+                success=False,
+                error=f"Error parsing response: {str(e)}"
+            )
+    
+    def _build_translation_prompt(
+        self, 
+        content: str, 
+        title: str, 
+        source_lang: str, 
+        target_lang: str
+    ) -> str:
+        """Build translation prompt."""
+        return _render_translation_prompt(content, title, source_lang, target_lang)
+    
+    def _build_optimization_prompt(
+        self, 
+        content: str, 
+        title: str, 
+        platform: str, 
+        optimization_type: str
+    ) -> str:
+        """Build content optimization prompt."""
+        return _render_optimization_prompt(content, title, platform, optimization_type)
+    
+    async def _render_prompt(self, render: Callable[..., str], content: str, *args) -> str:
+        """Render a prompt, off the event loop when the content is large."""
+        if len(content) < self.PROMPT_OFFLOAD_THRESHOLD:
+            return render(content, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.prompt_executor, render, content, *args)
+
+
+# Service instance
+_llm_service = None
+
+def get_llm_service() -> LLMAPIService:
+    """Get LLM service instance."""
+    global _llm_service
+    if _llm_service is None:
+        _llm_service = LLMAPIService()
+    return _llm_service
+
+
+async def startup_llm_service() -> LLMAPIService:
+    """Create the shared LLM service and open its connection pool (app startup)."""
+    service = get_llm_service()
+    await service.startup()
+    return service
+
+
+async def shutdown_llm_service():
+    """Close the shared LLM service session (app shutdown)."""
+    if _llm_service is not None:
+        await _llm_service.shutdown()
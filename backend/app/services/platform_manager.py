@@ -3,10 +3,13 @@ Platform manager for handling adapter registration and management.
 """
 
 import logging
-from typing import Dict, List, Optional, Type, Any
+import threading
+from typing import Dict, List, Optional, Tuple, Type, Any
 from datetime import datetime
 import importlib
+import importlib.util
 import inspect
+from types import ModuleType
 
 from ..adapters.base import (
     BaseAdapter, BaseSourceAdapter, BaseAIAdapter, 
@@ -16,6 +19,41 @@ from ..adapters.base import (
 
 logger = logging.getLogger(__name__)
 
+# Interface each adapter type must implement
+_BASE_CLASSES: Dict[AdapterType, Type[BaseAdapter]] = {
+    AdapterType.SOURCE: BaseSourceAdapter,
+    AdapterType.AI: BaseAIAdapter,
+    AdapterType.DETECTION: BaseDetectionAdapter,
+    AdapterType.PUBLISH: BasePublishAdapter
+}
+
+
+def _import_adapter_module(module_name: str) -> Optional[ModuleType]:
+    """
+    Import an adapter module on demand.
+    
+    Returns None if the module does not exist; errors raised by the module
+    itself (including its own missing dependencies) propagate.
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ModuleNotFoundError as e:
+        # The adapter module or its parent package (e.g. an adapter type
+        # without adapters) is missing
+        if e.name == module_name or module_name.startswith(f"{e.name}."):
+            return None
+        raise
+
+
+def _find_adapter_class(module: ModuleType) -> Optional[Type[BaseAdapter]]:
+    """Find the concrete adapter class defined in an adapter module."""
+    module_name = module.__name__
+    for _, cls in inspect.getmembers(module, inspect.isclass):
+        if (issubclass(cls, BaseAdapter) and cls.__module__ == module_name
+                and not inspect.isabstract(cls)):
+            return cls
+    return None
+
 
 class PluginRegistry:
     """Plugin registry for managing adapter plugins."""
@@ -51,14 +89,19 @@ class PlatformManager:
     
     def __init__(self):
         """Initialize platform manager."""
-        self.adapters = {
-            AdapterType.SOURCE: {},      # Source platform adapters
-            AdapterType.AI: {},          # AI service adapters
-            AdapterType.PUBLISH: {},     # Publishing platform adapters
-            AdapterType.DETECTION: {}    # Detection service adapters
+        # Adapters keyed by (type, name) so dispatch is a single lookup
+        self._adapters: Dict[Tuple[AdapterType, str], BaseAdapter] = {}
+        # Adapter names per type in registration order, for listing
+        self._adapter_names: Dict[AdapterType, List[str]] = {
+            AdapterType.SOURCE: [],      # Source platform adapters
+            AdapterType.AI: [],          # AI service adapters
+            AdapterType.PUBLISH: [],     # Publishing platform adapters
+            AdapterType.DETECTION: []    # Detection service adapters
         }
         self.plugin_registry = PluginRegistry()
         self._adapter_configs: Dict[str, Dict[str, Any]] = {}
+        # AdapterInfo lists per type, rebuilt after the adapters of that type change
+        self._adapter_info_cache: Dict[AdapterType, List[AdapterInfo]] = {}
     
     async def register_adapter(self, adapter_type: AdapterType, name: str, 
                              adapter: BaseAdapter) -> bool:
@@ -74,7 +117,7 @@ class PlatformManager:
             bool: True if registration successful
         """
         try:
-            if adapter_type not in self.adapters:
+            if adapter_type not in self._adapter_names:
                 raise ValueError(f"Unknown adapter type: {adapter_type}")
             
             # Validate adapter interface
@@ -85,12 +128,13 @@ class PlatformManager:
             await adapter.initialize()
             
             # Register adapter
-            self.adapters[adapter_type][name] = adapter
+            self._store_adapter(adapter_type, name, adapter)
+            self._adapter_info_cache.pop(adapter_type, None)
             
             # Save adapter configuration
             await self._save_adapter_config(adapter_type, name, adapter.get_config())
             
-            logger.info(f"Registered {adapter_type} adapter: {name}")
+            logger.info("Registered %s adapter: %s", adapter_type, name)
             return True
             
         except Exception as e:
@@ -109,9 +153,10 @@ class PlatformManager:
             bool: True if unregistration successful
         """
         try:
-            if adapter_type in self.adapters and name in self.adapters[adapter_type]:
-                del self.adapters[adapter_type][name]
-                logger.info(f"Unregistered {adapter_type} adapter: {name}")
+            if self._adapters.pop((adapter_type, name), None) is not None:
+                self._adapter_names[adapter_type].remove(name)
+                self._adapter_info_cache.pop(adapter_type, None)
+                logger.info("Unregistered %s adapter: %s", adapter_type, name)
                 return True
             return False
         except Exception as e:
@@ -130,14 +175,16 @@ class PlatformManager:
             BaseAdapter: Adapter instance or None if not found
         """
         try:
-            if adapter_type not in self.adapters:
-                raise ValueError(f"Unknown adapter type: {adapter_type}")
+            adapter = self._adapters.get((adapter_type, name))
+            if adapter is not None:
+                return adapter
             
-            if name not in self.adapters[adapter_type]:
-                # Try to dynamically load adapter
-                await self._load_adapter(adapter_type, name)
+            if adapter_type not in self._adapter_names:
+                raise ValueError(f"Unknown adapter type: {adapter_type}")
             
-            return self.adapters[adapter_type].get(name)
+            # Try to dynamically load adapter
+            await self._load_adapter(adapter_type, name)
+            return self._adapters.get((adapter_type, name))
             
         except Exception as e:
             logger.error(f"Failed to get adapter {name}: {e}")
@@ -159,7 +206,7 @@ class PlatformManager:
             
             return {
                 adapter_type.value: self._get_adapter_info(adapter_type)
-                for adapter_type in self.adapters.keys()
+                for adapter_type in self._adapter_names.keys()
             }
             
         except Exception as e:
@@ -203,8 +250,9 @@ class PlatformManager:
             adapter = await self.get_adapter(adapter_type, name)
             if adapter:
                 adapter.update_config(config)
+                self._adapter_info_cache.pop(adapter_type, None)
                 await self._save_adapter_config(adapter_type, name, config)
-                logger.info(f"Updated config for {adapter_type} adapter: {name}")
+                logger.info("Updated config for %s adapter: %s", adapter_type, name)
                 return True
             return False
         except Exception as e:
@@ -237,23 +285,30 @@ class PlatformManager:
     
     def _validate_adapter(self, adapter_type: AdapterType, adapter: BaseAdapter) -> bool:
         """Validate adapter implements required interface."""
-        base_classes = {
-            AdapterType.SOURCE: BaseSourceAdapter,
-            AdapterType.AI: BaseAIAdapter,
-            AdapterType.DETECTION: BaseDetectionAdapter,
-            AdapterType.PUBLISH: BasePublishAdapter
-        }
-        
-        base_class = base_classes.get(adapter_type)
-        if base_class:
-            return isinstance(adapter, base_class)
-        return isinstance(adapter, BaseAdapter)
+        # Adapters subclass the bases directly, so an MRO lookup suffices and
+        # skips the ABC __instancecheck__ machinery
+        base_class = _BASE_CLASSES.get(adapter_type, BaseAdapter)
+        return base_class in type(adapter).__mro__
+    
+    def _store_adapter(self, adapter_type: AdapterType, name: str, adapter: Any):
+        """Add or replace an adapter in the registry."""
+        if (adapter_type, name) not in self._adapters:
+            self._adapter_names[adapter_type].append(name)
+        self._adapters[(adapter_type, name)] = adapter
     
     def _get_adapter_info(self, adapter_type: AdapterType) -> List[AdapterInfo]:
-        """Get adapter information for given type."""
+        """Get adapter information for given type, cached until its adapters change."""
+        cached = self._adapter_info_cache.get(adapter_type)
+        if cached is None:
+            cached = self._adapter_info_cache[adapter_type] = self._build_adapter_info(adapter_type)
+        return list(cached)
+    
+    def _build_adapter_info(self, adapter_type: AdapterType) -> List[AdapterInfo]:
+        """Build adapter information for given type."""
         adapter_infos = []
         
-        for name, adapter in self.adapters[adapter_type].items():
+        for name in self._adapter_names[adapter_type]:
+            adapter = self._adapters[(adapter_type, name)]
             try:
                 platform_info = adapter.get_platform_info()
                 config = adapter.get_config()
@@ -276,10 +331,38 @@ class PlatformManager:
         return adapter_infos
     
     async def _load_adapter(self, adapter_type: AdapterType, name: str):
-        """Dynamically load adapter."""
+        """
+        Dynamically load adapter from ``app.adapters.<type>.<name>``.
+        
+        The module is only imported once the adapter is actually requested.
+        The adapter then goes through the same validation and initialization
+        as register_adapter.
+        """
         try:
-            # TODO: Implement dynamic adapter loading
-            logger.info(f"Attempting to load {adapter_type} adapter: {name}")
+            logger.info("Attempting to load %s adapter: %s", adapter_type, name)
+            module = _import_adapter_module(
+                importlib.util.resolve_name(f"..adapters.{adapter_type.value}.{name}", __package__)
+            )
+            if module is None:
+                logger.warning(f"No {adapter_type} adapter module named {name}")
+                return
+            
+            adapter_class = _find_adapter_class(module)
+            if adapter_class is None:
+                raise TypeError(f"No adapter class found in {module.__name__}")
+            
+            config = self._adapter_configs.get(f"{adapter_type.value}_{name}", {})
+            adapter = adapter_class(dict(config))
+            
+            # Validate adapter interface
+            if not self._validate_adapter(adapter_type, adapter):
+                raise TypeError(f"Adapter must implement {adapter_type} interface")
+            
+            # Initialize adapter
+            await adapter.initialize()
+            
+            self._store_adapter(adapter_type, name, adapter)
+            self._adapter_info_cache.pop(adapter_type, None)
         except Exception as e:
             logger.error(f"Failed to load adapter {name}: {e}")
     
@@ -290,15 +373,28 @@ class PlatformManager:
             key = f"{adapter_type.value}_{name}"
             self._adapter_configs[key] = config
             # TODO: Persist to database or file
-            logger.debug(f"Saved config for {key}")
+            logger.debug("Saved config for %s", key)
         except Exception as e:
             logger.error(f"Failed to save adapter config: {e}")
 
 
-# Global platform manager instance
-platform_manager = PlatformManager()
+# Global platform manager instance, created on first use
+_platform_manager: Optional[PlatformManager] = None
+_platform_manager_lock = threading.Lock()
 
 
 def get_platform_manager() -> PlatformManager:
-    """Get platform manager instance."""
-    return platform_manager
+    """Get platform manager instance (thread-safe)."""
+    global _platform_manager
+    if _platform_manager is None:
+        with _platform_manager_lock:
+            if _platform_manager is None:
+                _platform_manager = PlatformManager()
+    return _platform_manager
+
+
+def __getattr__(name: str) -> Any:
+    # Keep ``from .platform_manager import platform_manager`` working
+    if name == "platform_manager":
+        return get_platform_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
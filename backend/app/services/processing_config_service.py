@@ -2,31 +2,247 @@
 Processing configuration service for managing article processing workflows.
 """
 
+import atexit
+import json
 import logging
 import re
-from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+import sqlite3
+import threading
+import time
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 
-from ..models.processing_config import (
-    ProcessingRule, ContentClassificationRule, ProcessingHistory,
-    ContentCategory, ProcessingStrategy, ProviderLoadBalancing
-)
-from ..models.article import Article
-from ..models.prompt import PromptTemplate
-from ..models.config import APIProvider
-from ..core.database import get_db_session
+# SQLAlchemy and the models are imported where they are used, so importing
+# this service (e.g. for classification only) stays cheap.
+if TYPE_CHECKING:
+    from ..models.processing_config import ContentCategory
+    from ..models.article import Article
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Classification rule with its JSON columns decoded, URL patterns compiled
+# and target category resolved to the ContentCategory enum
+_ClassifyRule = namedtuple('_ClassifyRule', [
+    'classification_threshold', 'target_category',
+    'title_keywords', 'title_matcher', 'title_word_keywords', 'title_weight',
+    'content_keywords', 'content_matcher', 'content_word_keywords', 'content_weight',
+    'url_patterns', 'url_pattern_any', 'url_weight',
+    'source_domains', 'domain_weight',
+    'remaining_max'  # Highest score any later rule can reach
+])
+
+# Lowercased article fields shared by every rule during one classification;
+# the token sets are only filled in when some rule scores keywords by token
+_ArticleFeatures = namedtuple('_ArticleFeatures', [
+    'title_lc', 'content_lc', 'url_lc', 'title_tokens', 'content_tokens'
+])
+
+_WORD_RE = re.compile(r'\w+')
+
+# Backreferences would point at the wrong group once patterns are alternated
+_BACKREF_RE = re.compile(r'\\[1-9]|\(\?P=')
+
+# Detached copy of a processing_rules row, safe to share between callers
+_ProcessingRuleSnapshot = namedtuple('_ProcessingRuleSnapshot', [
+    'id', 'name', 'content_category', 'source_platform', 'target_platform',
+    'processing_strategy', 'translation_prompt_id', 'optimization_prompt_id',
+    'title_generation_prompt_id', 'primary_provider_id', 'fallback_provider_id',
+    'ai_detection_threshold', 'max_optimization_rounds', 'quality_threshold',
+    'priority', 'is_default'
+])
+
+
+def _load_json_list(value: Any) -> List[str]:
+    """Decode a JSON list column from a raw sqlite row."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+def _build_keyword_matcher(keywords: List[str]) -> Optional[Any]:
+    """
+    Build an Aho-Corasick automaton over lowercased keywords.
+    
+    Each keyword maps to how many times it appears in the rule so duplicates
+    keep counting as in the linear scan. Returns None when pyahocorasick is
+    not installed or a keyword is empty.
+    """
+    if not AHOCORASICK_AVAILABLE or not keywords:
+        return None
+    
+    counts: Dict[str, int] = {}
+    for keyword in keywords:
+        keyword = keyword.lower()
+        if not keyword:
+            return None
+        counts[keyword] = counts.get(keyword, 0) + 1
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, count in counts.items():
+        automaton.add_word(keyword, (keyword, count))
+    automaton.make_automaton()
+    return automaton
+
+
+def _combine_patterns(patterns: List[re.Pattern]) -> Optional[re.Pattern]:
+    """
+    Alternate a rule's URL patterns into one regex that finds any match.
+    
+    Patterns are admin-defined rule data. Returns None for a single pattern
+    or when the patterns cannot be combined safely.
+    """
+    if len(patterns) < 2 or any(_BACKREF_RE.search(p.pattern) for p in patterns):
+        return None
+    try:
+        return re.compile('|'.join(f'(?:{p.pattern})' for p in patterns), re.IGNORECASE)
+    except re.error:
+        # e.g. inline global flags, which must lead the whole expression
+        return None
+
+
+def _max_rule_score(rule: '_ClassifyRule') -> float:
+    """Upper bound of the score a rule can give, all its matchers hitting."""
+    total = 0.0
+    if rule.title_keywords:
+        total += rule.title_weight
+    if rule.content_keywords:
+        total += rule.content_weight
+    if rule.url_patterns:
+        total += rule.url_weight
+    if rule.source_domains:
+        total += rule.domain_weight
+    return min(total, 1.0)
+
+
+def _is_word_keyword_list(keywords: List[str], matcher: Optional[Any]) -> bool:
+    """Whether a rule without a keyword matcher can try token lookups first."""
+    return matcher is None and bool(keywords) and all(k.isalnum() for k in keywords)
+
 
 class ProcessingConfigService:
     """Service for managing processing configurations and rules."""
     
+    # Lifetime (seconds) of the in-memory copy of active classification rules
+    RULES_CACHE_TTL = 60.0
+    # Distinct (category, source, target) processing rule lookups kept
+    PROCESSING_RULE_CACHE_SIZE = 256
+    # Buffered processing history rows written per transaction
+    HISTORY_FLUSH_THRESHOLD = 50
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self._rules_cache: Optional[Tuple[float, List[_ClassifyRule]]] = None
+        self._rules_need_tokens = False
+        # Compiled URL patterns per classification rule id
+        self._pattern_cache: Dict[int, List[re.Pattern]] = {}
+        self._lookup_processing_rule = lru_cache(maxsize=self.PROCESSING_RULE_CACHE_SIZE)(
+            self._query_processing_rule
+        )
+        self._history_buffer: List[Tuple[Any, ...]] = []
+        self._history_lock = threading.Lock()
+        # One sqlite connection per thread, kept open so its statement cache
+        # serves the repeated rule and history queries
+        self._local = threading.local()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get this thread's database connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            from ..core.database import get_db_connection
+            conn = self._local.conn = get_db_connection()
+        return conn
+    
+    def clear_pattern_cache(self):
+        """Drop compiled URL patterns; call after classification rules change."""
+        self._pattern_cache.clear()
+    
+    def invalidate_rules_cache(self):
+        """Force the next lookups to reload classification and processing rules."""
+        self._rules_cache = None
+        self.clear_pattern_cache()
+        self._lookup_processing_rule.cache_clear()
     
-    def classify_article(self, article: Article) -> Tuple[ContentCategory, float]:
+    def _get_active_rules(self) -> List[_ClassifyRule]:
+        """Get active classification rules, re-querying at most once per TTL."""
+        cached = self._rules_cache
+        if cached and time.monotonic() - cached[0] < self.RULES_CACHE_TTL:
+            return cached[1]
+        
+        # Use direct database connection for synchronous operation
+        rows = self._get_connection().execute("""
+            SELECT * FROM content_classification_rules
+            WHERE is_active = 1
+            ORDER BY priority
+        """).fetchall()
+        
+        # Rule rows may have been edited since the patterns were compiled
+        self.clear_pattern_cache()
+        from ..models.processing_config import ContentCategory
+        
+        rules = []
+        for row in rows:
+            try:
+                target_category = ContentCategory(row['target_category'])
+            except ValueError:
+                self.logger.warning(
+                    f"Skipping classification rule {row['id']}: unknown category {row['target_category']!r}"
+                )
+                continue
+            
+            title_keywords = [k.lower() for k in _load_json_list(row['title_keywords'])]
+            content_keywords = [k.lower() for k in _load_json_list(row['content_keywords'])]
+            title_matcher = _build_keyword_matcher(title_keywords)
+            content_matcher = _build_keyword_matcher(content_keywords)
+            url_patterns = self._get_compiled_patterns(row['id'], row['url_patterns'])
+            rules.append(_ClassifyRule(
+                classification_threshold=row['classification_threshold'],
+                target_category=target_category,
+                title_keywords=title_keywords,
+                title_matcher=title_matcher,
+                title_word_keywords=_is_word_keyword_list(title_keywords, title_matcher),
+                title_weight=row['title_weight'],
+                content_keywords=content_keywords,
+                content_matcher=content_matcher,
+                content_word_keywords=_is_word_keyword_list(content_keywords, content_matcher),
+                content_weight=row['content_weight'],
+                url_patterns=url_patterns,
+                url_pattern_any=_combine_patterns(url_patterns),
+                url_weight=row['url_weight'],
+                source_domains=_load_json_list(row['source_domains']),
+                domain_weight=row['domain_weight'],
+                remaining_max=0.0
+            ))
+        
+        # Bound what the rules after each one can still score, for early exit
+        remaining_max = 0.0
+        for i in range(len(rules) - 1, -1, -1):
+            rules[i] = rules[i]._replace(remaining_max=remaining_max)
+            remaining_max = max(remaining_max, _max_rule_score(rules[i]))
+        
+        self._rules_need_tokens = any(
+            rule.title_word_keywords or rule.content_word_keywords for rule in rules
+        )
+        self._rules_cache = (time.monotonic(), rules)
+        return rules
+    
+    def _get_compiled_patterns(self, rule_id: int, patterns: Any) -> List[re.Pattern]:
+        """Get the compiled URL patterns for a rule, compiling on first use."""
+        compiled = self._pattern_cache.get(rule_id)
+        if compiled is None:
+            compiled = [re.compile(p, re.IGNORECASE) for p in _load_json_list(patterns)]
+            self._pattern_cache[rule_id] = compiled
+        return compiled
+    
+    def classify_article(self, article: 'Article') -> Tuple['ContentCategory', float]:
         """
         Classify article into content category based on classification rules.
         
@@ -36,105 +252,166 @@ class ProcessingConfigService:
         Returns:
             Tuple of (category, confidence_score)
         """
+        return self.classify_articles([article])[0]
+    
+    def classify_articles(self, articles: List['Article']) -> List[Tuple['ContentCategory', float]]:
+        """
+        Classify a batch of articles, loading the rules once for all of them.
+        
+        Args:
+            articles: Articles to classify
+            
+        Returns:
+            List of (category, confidence_score) tuples, in input order
+        """
+        from ..models.processing_config import ContentCategory
+        
         try:
-            # Use direct database connection for synchronous operation
-            from ..core.database import get_db_connection
-            conn = get_db_connection()
+            rules = self._get_active_rules()
+        except Exception as e:
+            self.logger.error(f"Error classifying article: {e}")
+            return [(ContentCategory.GENERAL, 0.0)] * len(articles)
+        
+        if not rules:
+            self.logger.warning("No classification rules found, using GENERAL category")
+            return [(ContentCategory.GENERAL, 0.5)] * len(articles)
+        
+        results = []
+        for article in articles:
             try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM content_classification_rules
-                    WHERE is_active = 1
-                    ORDER BY priority
-                """)
-                rules = cursor.fetchall()
-                
-                if not rules:
-                    self.logger.warning("No classification rules found, using GENERAL category")
-                    return ContentCategory.GENERAL, 0.5
-                
-                # Calculate scores for each category
-                category_scores = {}
-                
-                for rule in rules:
-                    # Create a simple rule object for compatibility
-                    rule_obj = type('Rule', (), {
-                        'classification_threshold': rule['classification_threshold'],
-                        'target_category': rule['target_category'],
-                        'keywords': rule['keywords'],
-                        'weight': rule['weight']
-                    })()
+                results.append(self._classify_with_rules(article, rules))
+            except Exception as e:
+                self.logger.error(f"Error classifying article: {e}")
+                results.append((ContentCategory.GENERAL, 0.0))
+        return results
+    
+    def _classify_with_rules(
+        self, article: 'Article', rules: List[_ClassifyRule]
+    ) -> Tuple['ContentCategory', float]:
+        """Score one article against the loaded rules and pick its category."""
+        from ..models.processing_config import ContentCategory
+        
+        # Collect the scores that meet each rule's threshold per category
+        matched_scores = defaultdict(list)
+        
+        features = self._extract_features(article)
+        best_score = 0.0
+        for rule in rules:
+            score = self._calculate_classification_score(features, rule)
 
-                    score = self._calculate_classification_score(article, rule_obj)
+            if score >= rule.classification_threshold:
+                matched_scores[rule.target_category].append(score)
+                if score > best_score:
+                    best_score = score
 
-                    if score >= rule_obj.classification_threshold:
-                        category = ContentCategory(rule_obj.target_category)
-                        if category not in category_scores or score > category_scores[category]:
-                            category_scores[category] = score
+            # Later rules can neither overtake nor tie the current best
+            if best_score > rule.remaining_max:
+                break
 
-                # Return the category with highest score
-                if category_scores:
-                    best_category = max(category_scores.items(), key=lambda x: x[1])
-                    self.logger.info(f"Article classified as {best_category[0]} with confidence {best_category[1]:.2f}")
-                    return best_category
-                else:
-                    self.logger.info("No category met threshold, using GENERAL")
-                    return ContentCategory.GENERAL, 0.3
-            finally:
-                conn.close()
+        # Reduce to the best score per category
+        category_scores = {
+            category: max(scores) for category, scores in matched_scores.items()
+        }
 
-        except Exception as e:
-            self.logger.error(f"Error classifying article: {e}")
-            return ContentCategory.GENERAL, 0.0
+        # Return the category with highest score
+        if category_scores:
+            best_category = max(category_scores.items(), key=lambda x: x[1])
+            self.logger.info("Article classified as %s with confidence %.2f", best_category[0], best_category[1])
+            return best_category
+        else:
+            self.logger.info("No category met threshold, using GENERAL")
+            return ContentCategory.GENERAL, 0.3
     
-    def _calculate_classification_score(self, article: Article, rule: ContentClassificationRule) -> float:
+    def _extract_features(self, article: 'Article') -> _ArticleFeatures:
+        """Lowercase (and tokenize, if needed) the article fields used for scoring."""
+        title_lc = article.title.lower() if article.title else ''
+        content_lc = article.content_original[:1000].lower() if article.content_original else ''  # First 1000 chars
+        if self._rules_need_tokens:
+            title_tokens = frozenset(_WORD_RE.findall(title_lc))
+            content_tokens = frozenset(_WORD_RE.findall(content_lc))
+        else:
+            title_tokens = content_tokens = None
+        
+        return _ArticleFeatures(
+            title_lc=title_lc,
+            content_lc=content_lc,
+            url_lc=article.source_url.lower() if article.source_url else '',
+            title_tokens=title_tokens,
+            content_tokens=content_tokens
+        )
+    
+    def _calculate_classification_score(self, features: _ArticleFeatures, rule: _ClassifyRule) -> float:
         """Calculate classification score for an article against a rule."""
         total_score = 0.0
         
         # Title keyword matching
-        if rule.title_keywords and article.title:
+        if rule.title_keywords and features.title_lc:
             title_score = self._calculate_keyword_score(
-                article.title.lower(), rule.title_keywords
+                features.title_lc, rule.title_keywords, rule.title_matcher,
+                features.title_tokens if rule.title_word_keywords else None
             )
             total_score += title_score * rule.title_weight
         
         # Content keyword matching
-        if rule.content_keywords and article.content_original:
+        if rule.content_keywords and features.content_lc:
             content_score = self._calculate_keyword_score(
-                article.content_original.lower()[:1000], rule.content_keywords  # First 1000 chars
+                features.content_lc, rule.content_keywords, rule.content_matcher,
+                features.content_tokens if rule.content_word_keywords else None
             )
             total_score += content_score * rule.content_weight
         
         # URL pattern matching
-        if rule.url_patterns and article.source_url:
+        if rule.url_patterns and features.url_lc:
             url_score = self._calculate_pattern_score(
-                article.source_url.lower(), rule.url_patterns
+                features.url_lc, rule.url_patterns, rule.url_pattern_any
             )
             total_score += url_score * rule.url_weight
         
         # Domain matching
-        if rule.source_domains and article.source_url:
+        if rule.source_domains and features.url_lc:
             domain_score = self._calculate_domain_score(
-                article.source_url, rule.source_domains
+                features.url_lc, rule.source_domains
             )
             total_score += domain_score * rule.domain_weight
         
         return min(total_score, 1.0)  # Cap at 1.0
     
-    def _calculate_keyword_score(self, text: str, keywords: List[str]) -> float:
-        """Calculate keyword matching score."""
+    def _calculate_keyword_score(
+        self, text: str, keywords: List[str], matcher: Optional[Any] = None,
+        tokens: Optional[frozenset] = None
+    ) -> float:
+        """
+        Calculate keyword matching score for lowercased text and keywords.
+        
+        Uses the rule's automaton when one is built; otherwise word keywords
+        are looked up in the text's token set first, and only a miss falls
+        back to the substring scan (a keyword may still occur inside a word).
+        """
         if not keywords or not text:
             return 0.0
         
-        matches = sum(1 for keyword in keywords if keyword.lower() in text)
+        if matcher is not None:
+            found = {value for _, value in matcher.iter(text)}
+            matches = sum(count for _, count in found)
+        elif tokens is not None:
+            matches = sum(1 for keyword in keywords if keyword in tokens or keyword in text)
+        else:
+            matches = sum(1 for keyword in keywords if keyword in text)
         return matches / len(keywords)
     
-    def _calculate_pattern_score(self, text: str, patterns: List[str]) -> float:
-        """Calculate pattern matching score."""
+    def _calculate_pattern_score(
+        self, text: str, patterns: List[re.Pattern], combined: Optional[re.Pattern] = None
+    ) -> float:
+        """Calculate pattern matching score against precompiled patterns."""
         if not patterns or not text:
             return 0.0
         
-        matches = sum(1 for pattern in patterns if re.search(pattern, text, re.IGNORECASE))
+        # One pass rules out the common no-match case; only a hit needs the
+        # per-pattern count
+        if combined is not None and not combined.search(text):
+            return 0.0
+        
+        matches = sum(1 for pattern in patterns if pattern.search(text))
         return matches / len(patterns)
     
     def _calculate_domain_score(self, url: str, domains: List[str]) -> float:
@@ -147,71 +424,81 @@ class ProcessingConfigService:
     
     def get_processing_rule(
         self, 
-        content_category: ContentCategory,
+        content_category: 'ContentCategory',
         source_platform: str = None,
         target_platform: str = None
-    ) -> Optional[ProcessingRule]:
+    ) -> Optional[_ProcessingRuleSnapshot]:
         """
         Get the best matching processing rule for given criteria.
         
+        Lookups are memoized per (category, source, target) until
+        invalidate_rules_cache() is called.
+        
         Args:
             content_category: Content category
             source_platform: Source platform (optional)
             target_platform: Target platform (optional)
             
         Returns:
-            Best matching ProcessingRule or None
+            Snapshot of the best matching processing rule or None
         """
         try:
-            with get_db_session() as session:
-                query = session.query(ProcessingRule).filter(
-                    ProcessingRule.is_active == True,
-                    ProcessingRule.content_category == content_category.value
-                )
-                
-                # Add platform filters if provided
-                if source_platform:
-                    query = query.filter(
-                        or_(
-                            ProcessingRule.source_platform == source_platform,
-                            ProcessingRule.source_platform.is_(None)
-                        )
-                    )
-                
-                if target_platform:
-                    query = query.filter(
-                        or_(
-                            ProcessingRule.target_platform == target_platform,
-                            ProcessingRule.target_platform.is_(None)
-                        )
-                    )
-                
-                # Order by priority (lower number = higher priority)
-                rules = query.order_by(ProcessingRule.priority).all()
-                
-                if rules:
-                    rule = rules[0]  # Get highest priority rule
-                    self.logger.info(f"Selected processing rule: {rule.name}")
-                    return rule
-                else:
-                    # Try to get default rule
-                    default_rule = session.query(ProcessingRule).filter(
-                        ProcessingRule.is_active == True,
-                        ProcessingRule.is_default == True
-                    ).first()
-                    
-                    if default_rule:
-                        self.logger.info(f"Using default processing rule: {default_rule.name}")
-                        return default_rule
-                    else:
-                        self.logger.warning("No processing rule found")
-                        return None
-                        
+            return self._lookup_processing_rule(
+                content_category.value, source_platform, target_platform
+            )
         except Exception as e:
             self.logger.error(f"Error getting processing rule: {e}")
             return None
     
-    def get_processing_configuration(self, article: Article) -> Dict[str, Any]:
+    def _query_processing_rule(
+        self,
+        content_category: str,
+        source_platform: Optional[str],
+        target_platform: Optional[str]
+    ) -> Optional[_ProcessingRuleSnapshot]:
+        """Query the best matching processing rule from the database."""
+        query = """
+            SELECT * FROM processing_rules
+            WHERE is_active = 1 AND content_category = ?
+        """
+        params: List[Any] = [content_category]
+        
+        # Add platform filters if provided
+        if source_platform:
+            query += " AND (source_platform = ? OR source_platform IS NULL)"
+            params.append(source_platform)
+        
+        if target_platform:
+            query += " AND (target_platform = ? OR target_platform IS NULL)"
+            params.append(target_platform)
+        
+        # Order by priority (lower number = higher priority)
+        query += " ORDER BY priority LIMIT 1"
+        
+        conn = self._get_connection()
+        row = conn.execute(query, params).fetchone()
+        
+        if row:
+            self.logger.info("Selected processing rule: %s", row['name'])
+        else:
+            # Try to get default rule
+            row = conn.execute("""
+                SELECT * FROM processing_rules
+                WHERE is_active = 1 AND is_default = 1
+                LIMIT 1
+            """).fetchone()
+            
+            if row:
+                self.logger.info("Using default processing rule: %s", row['name'])
+            else:
+                self.logger.warning("No processing rule found")
+                return None
+        
+        return _ProcessingRuleSnapshot(**{
+            field: row[field] for field in _ProcessingRuleSnapshot._fields
+        })
+    
+    def get_processing_configuration(self, article: 'Article') -> Dict[str, Any]:
         """
         Get complete processing configuration for an article.
         
@@ -221,6 +508,8 @@ class ProcessingConfigService:
         Returns:
             Dictionary containing processing configuration
         """
+        from ..models.processing_config import ContentCategory
+        
         try:
             # Classify the article
             content_category, confidence = self.classify_article(article)
@@ -256,15 +545,17 @@ class ProcessingConfigService:
                 }
             }
             
-            self.logger.info(f"Generated processing configuration for article {article.id}")
+            self.logger.info("Generated processing configuration for article %s", article.id)
             return config
             
         except Exception as e:
             self.logger.error(f"Error generating processing configuration: {e}")
             return self._get_default_configuration(ContentCategory.GENERAL)
     
-    def _get_default_configuration(self, content_category: ContentCategory) -> Dict[str, Any]:
+    def _get_default_configuration(self, content_category: 'ContentCategory') -> Dict[str, Any]:
         """Get default processing configuration."""
+        from ..models.processing_config import ProcessingStrategy
+        
         return {
             "content_category": content_category.value,
             "classification_confidence": 0.0,
@@ -290,32 +581,74 @@ class ProcessingConfigService:
         config: Dict[str, Any],
         result: Dict[str, Any]
     ):
-        """Record processing history for analytics."""
+        """
+        Record processing history for analytics.
+        
+        Rows are buffered and written HISTORY_FLUSH_THRESHOLD at a time; call
+        flush_history() to write pending rows immediately.
+        """
         try:
-            with get_db_session() as session:
-                history = ProcessingHistory(
-                    article_id=article_id,
-                    processing_rule_id=config.get("processing_rule_id"),
-                    content_category=config.get("content_category"),
-                    classification_confidence=config.get("classification_confidence"),
-                    used_prompts=config.get("prompts"),
-                    used_providers=config.get("providers"),
-                    processing_steps=result.get("steps", []),
-                    success=result.get("success", False),
-                    error_message=result.get("error"),
-                    processing_time=result.get("processing_time", 0.0),
-                    final_ai_probability=result.get("final_ai_probability"),
-                    optimization_rounds=result.get("optimization_rounds", 0),
-                    quality_score=result.get("quality_score", 0.0)
-                )
-                
-                session.add(history)
-                session.commit()
-                
-                self.logger.info(f"Recorded processing history for article {article_id}")
+            row = (
+                article_id,
+                config.get("processing_rule_id"),
+                config.get("content_category"),
+                config.get("classification_confidence"),
+                json.dumps(config.get("prompts")),
+                json.dumps(config.get("providers")),
+                json.dumps(result.get("steps", [])),
+                result.get("success", False),
+                result.get("error"),
+                result.get("processing_time", 0.0),
+                result.get("final_ai_probability"),
+                result.get("optimization_rounds", 0),
+                result.get("quality_score", 0.0)
+            )
+            
+            with self._history_lock:
+                self._history_buffer.append(row)
+                should_flush = len(self._history_buffer) >= self.HISTORY_FLUSH_THRESHOLD
+            
+            self.logger.debug("Queued processing history for article %s", article_id)
+            
+            if should_flush:
+                self.flush_history()
                 
         except Exception as e:
             self.logger.error(f"Error recording processing history: {e}")
+    
+    def flush_history(self) -> int:
+        """Write buffered processing history rows in a single transaction."""
+        with self._history_lock:
+            rows, self._history_buffer = self._history_buffer, []
+        
+        if not rows:
+            return 0
+        
+        try:
+            conn = self._get_connection()
+            # The connection autocommits; one explicit transaction for the batch
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("""
+                    INSERT INTO processing_history (
+                        article_id, processing_rule_id, content_category,
+                        classification_confidence, used_prompts, used_providers,
+                        processing_steps, success, error_message, processing_time,
+                        final_ai_probability, optimization_rounds, quality_score,
+                        created_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            
+            self.logger.info("Recorded processing history for %d articles", len(rows))
+            return len(rows)
+            
+        except Exception as e:
+            self.logger.error(f"Error recording processing history ({len(rows)} rows dropped): {e}")
+            return 0
 
 
 # Global service instance
@@ -326,4 +659,6 @@ def get_processing_config_service() -> ProcessingConfigService:
     global _processing_config_service
     if _processing_config_service is None:
         _processing_config_service = ProcessingConfigService()
+        # Don't lose buffered history rows on shutdown
+        atexit.register(_processing_config_service.flush_history)
     return _processing_config_service
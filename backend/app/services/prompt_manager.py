@@ -2,14 +2,52 @@
 Enhanced prompt management service for AI detection evasion.
 """
 
+import json
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import re
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from hashlib import blake2b
+from itertools import product
+from typing import Callable, Dict, List, NamedTuple, Optional, Any, Tuple
 from enum import Enum
-from datetime import datetime
 import random
+from types import MappingProxyType
 
 from ..models.prompt import PromptTemplate, PromptType
-from ..core.database import get_db_session, get_db_connection
+from ..core.database import get_db_connection
+
+# Rows pulled from SQLite per fetchmany() call when loading templates
+_TEMPLATE_FETCH_SIZE = 64
+
+# Template placeholders look like {content}; other braces are literal text
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+
+@lru_cache(maxsize=256)
+def _parse_template(text: str) -> Tuple[str, ...]:
+    """
+    Split a template into literal text at even and placeholder names at odd indexes.
+    
+    Keyed by the template text, so reloading templates after a save only
+    re-parses the ones whose text actually changed.
+    """
+    return tuple(_PLACEHOLDER_RE.split(text))
+
+
+def _render_parts(parts: Tuple[str, ...], variables: Dict[str, str]) -> str:
+    """Fill a pre-split template in one pass, keeping unknown placeholders as-is."""
+    filled = list(parts)
+    for i in range(1, len(filled), 2):
+        name = filled[i]
+        filled[i] = str(variables[name]) if name in variables else f"{{{name}}}"
+    return "".join(filled)
 
 
 class OptimizationLevel(str, Enum):
@@ -27,43 +65,427 @@ class ContentType(str, Enum):
     GENERAL = "general"
 
 
+# Interned enum values for cache keys and logging in the hot path
+_LEVEL_STR = MappingProxyType({level: sys.intern(level.value) for level in OptimizationLevel})
+_CONTENT_TYPE_STR = MappingProxyType({ct: sys.intern(ct.value) for ct in ContentType})
+_PROMPT_TYPE_STR = MappingProxyType({pt: sys.intern(pt.value) for pt in PromptType})
+
+# AI probability thresholds; a level applies strictly above its threshold
+_LEVEL_THRESHOLDS = (25, 50)
+_LEVELS_BY_BUCKET = (OptimizationLevel.LIGHT, OptimizationLevel.STANDARD, OptimizationLevel.HEAVY)
+
+# Stored template names per (prompt type, optimization level)
+_TEMPLATE_NAMES = MappingProxyType({
+    (_PROMPT_TYPE_STR[PromptType.OPTIMIZATION], _LEVEL_STR[OptimizationLevel.LIGHT]): "basic_humanization_v2",
+    (_PROMPT_TYPE_STR[PromptType.OPTIMIZATION], _LEVEL_STR[OptimizationLevel.STANDARD]): "ai_trace_reduction_v2",
+    (_PROMPT_TYPE_STR[PromptType.OPTIMIZATION], _LEVEL_STR[OptimizationLevel.HEAVY]): "ai_trace_reduction_v2",
+})
+
+
+@dataclass
+class PromptSpec:
+    """One optimization prompt request for get_optimization_prompts_batch."""
+    content: str
+    ai_probability: float
+    round_number: int = 1
+    content_type: ContentType = ContentType.GENERAL
+    detection_feedback: str = ""
+    platform: str = "toutiao"
+
+
+class _CachedTemplate(NamedTuple):
+    """Active prompt template row, with its text pre-split for filling."""
+    id: int
+    name: str
+    type: str
+    template: str
+    is_active: int
+    parts: Tuple[str, ...]
+
+
+# Requirements shared by every optimization level
+_BASE_REQUIREMENTS = (
+    "保持原文的核心观点和关键信息完整性",
+    "确保内容的逻辑结构清晰合理"
+)
+
+# Level-specific requirements
+_LEVEL_REQUIREMENTS = MappingProxyType({
+    OptimizationLevel.LIGHT: (
+        "调整部分句式结构，增加表达的自然性",
+        "适当添加一些个人化的表达方式",
+        "保持原文的整体风格和语调"
+    ),
+    OptimizationLevel.STANDARD: (
+        "显著改变句式结构和表达方式",
+        "增加更多个人化的见解和评论",
+        "调整段落组织，使其更符合人类写作习惯",
+        "添加适当的口语化表达和语气词"
+    ),
+    OptimizationLevel.HEAVY: (
+        "彻底重构文章的表达方式和语言风格",
+        "大量增加个人化的观点、经验和感受",
+        "完全改变句式模式，避免AI写作的规整性",
+        "添加丰富的情感色彩和主观判断",
+        "模拟真实的人类思维过程和表达习惯",
+        "增加不规则的语言特征和个性化表达"
+    )
+})
+
+# Level requirements as one line, for the {level_requirements} template variable
+_LEVEL_REQ_TEXT = MappingProxyType({
+    level: "; ".join(requirements) for level, requirements in _LEVEL_REQUIREMENTS.items()
+})
+
+# Content type specific requirements
+_CONTENT_REQUIREMENTS = MappingProxyType({
+    ContentType.TECHNICAL: (
+        "保持技术术语的准确性和专业性",
+        "添加个人的技术见解和实践经验",
+        "适当分享相关的技术背景和应用场景"
+    ),
+    ContentType.NEWS: (
+        "增加新闻评论和个人观点",
+        "添加对事件的分析和预测",
+        "融入时事背景和相关联想"
+    ),
+    ContentType.TUTORIAL: (
+        "增加个人的学习心得和实践建议",
+        "添加常见问题和解决方案的分享",
+        "融入教学经验和学习技巧"
+    ),
+    ContentType.GENERAL: (
+        "增加个人的生活感悟和经验分享",
+        "添加相关的联想和思考过程"
+    )
+})
+
+# Platform specific requirements
+_PLATFORM_REQUIREMENTS = MappingProxyType({
+    "toutiao": (
+        "标题要有吸引力，内容要有话题性",
+        "适合大众阅读，语言通俗易懂",
+        "增加互动性和争议性元素"
+    ),
+    "weixin": (
+        "内容要有价值，适合分享传播",
+        "语言要精准，逻辑要清晰",
+        "增加实用性和可操作性"
+    ),
+    "zhihu": (
+        "内容要专业深入，有知识价值",
+        "逻辑要严密，论证要充分",
+        "增加专业性和权威性"
+    )
+})
+
+# Combined requirements per (level, content_type, platform), filled on first use
+_REQUIREMENTS_CACHE: Dict[Tuple[OptimizationLevel, ContentType, str], Tuple[str, ...]] = {}
+
+# Base optimization objective per level
+_BASE_OBJECTIVES = MappingProxyType({
+    OptimizationLevel.LIGHT: "对内容进行轻度优化，提升自然度和可读性",
+    OptimizationLevel.STANDARD: "对内容进行中度改写，显著降低AI痕迹",
+    OptimizationLevel.HEAVY: "对内容进行深度重构，彻底消除AI生成特征"
+})
+
+# Appended to the objective from the second optimization round on
+_ROUND_NOTE = "（第{}轮优化，需要更加彻底的改写）"
+
+# Renders a dynamic prompt from (content, round_number, detection_feedback)
+_DynamicRenderer = Callable[[str, int, str], str]
+
+# Renders a stored template from its variables
+_TemplateRenderer = Callable[[Dict[str, str]], str]
+
+
+def _make_dynamic_renderer(header: str, objective: str, requirements_block: str) -> _DynamicRenderer:
+    """
+    Build the dynamic prompt renderer for one (level, content_type, platform).
+
+    Role, objective and requirements are fixed per combination, so they are
+    folded into the closure and each call is a single f-string.
+    """
+    prefix = header + objective
+
+    def render(content: str, round_number: int, detection_feedback: str) -> str:
+        round_note = _ROUND_NOTE.format(round_number) if round_number > 1 else ""
+        # Add detection feedback if available
+        feedback_block = f"\n\n检测反馈：{detection_feedback}" if detection_feedback else ""
+        return (
+            f"{prefix}{round_note}{requirements_block}{feedback_block}"
+            f"\n\n原文内容：\n{content}\n\n请直接输出优化后的内容，不要添加任何解释或说明。"
+        )
+
+    return render
+
+
+# Language display names for translation prompts
+_LANGUAGE_NAMES = MappingProxyType({
+    "en": "英文",
+    "zh": "中文",
+    "ja": "日文",
+    "ko": "韩文"
+})
+
+# Translation prompt; title_block is empty or "文章标题：...\n\n"
+_TRANSLATION_TEMPLATE = """你是{role}，同时也是一位专业的翻译专家。
+
+请将以下{source_name}内容翻译成{target_name}，要求：
+
+1. 保持原文的核心观点和信息完整性
+2. 使用自然流畅的中文表达，避免翻译腔
+3. 适当调整句式以符合中文阅读习惯
+4. 保留专业术语的准确性
+5. 增加适当的本土化表达，使其更符合中文语境
+6. 保持段落结构，但可以适当调整句子组织
+
+{title_block}原文内容：
+{content}
+
+请直接输出翻译结果，不要添加任何解释或说明。"""
+
+# Built-in enhanced optimization templates
+_BASIC_HUMANIZATION_TEMPLATE = """你是一位专业的内容创作专家，具有多年的写作和编辑经验。
+
+优化目标：对内容进行轻度优化，提升自然度和可读性
+
+具体要求：
+1. 保持原文的核心观点和关键信息完整性
+2. 确保内容的逻辑结构清晰合理
+3. 调整部分句式结构，增加表达的自然性
+4. 适当添加一些个人化的表达方式
+5. 保持原文的整体风格和语调
+
+原文内容：
+{content}
+
+请直接输出优化后的内容，不要添加任何解释或说明。"""
+
+_AI_TRACE_REDUCTION_TEMPLATE = """你是一位资深的内容创作者，具有丰富的写作经验和深厚的行业背景。
+
+优化目标：对内容进行深度重构，彻底消除AI生成特征
+
+具体要求：
+1. 保持原文的核心观点和关键信息完整性
+2. 彻底重构文章的表达方式和语言风格
+3. 大量增加个人化的观点、经验和感受
+4. 完全改变句式模式，避免AI写作的规整性
+5. 添加丰富的情感色彩和主观判断
+6. 模拟真实的人类思维过程和表达习惯
+7. 增加不规则的语言特征和个性化表达
+8. 适当添加口语化表达和语气词
+
+{detection_feedback}
+
+原文内容：
+{content}
+
+请直接输出优化后的内容，不要添加任何解释或说明。"""
+
+_TECHNICAL_HUMANIZATION_TEMPLATE = """你是一位资深的技术内容创作者，具有丰富的技术写作经验和深厚的行业背景。
+
+优化目标：{objective}
+
+具体要求：
+1. 保持原文的核心观点和关键信息完整性
+2. 保持技术术语的准确性和专业性
+3. 添加个人的技术见解和实践经验
+4. 适当分享相关的技术背景和应用场景
+5. {level_requirements}
+6. 确保内容适合{platform}平台发布
+
+{detection_feedback}
+
+原文内容：
+{content}
+
+请直接输出优化后的内容，不要添加任何解释或说明。"""
+
+# (name, display_name, description, template, variables, priority)
+_ENHANCED_TEMPLATES = (
+    (
+        "basic_humanization_v2",
+        "基础人性化优化模板 v2.0",
+        "基础的内容人性化优化，适用于轻度AI痕迹降低",
+        _BASIC_HUMANIZATION_TEMPLATE,
+        ("content",),
+        5
+    ),
+    (
+        "ai_trace_reduction_v2",
+        "AI痕迹深度降低模板 v2.0",
+        "专门用于降低AI检测浓度的深度优化模板",
+        _AI_TRACE_REDUCTION_TEMPLATE,
+        ("content", "detection_feedback"),
+        10
+    ),
+    (
+        "technical_humanization_v2",
+        "技术内容人性化模板 v2.0",
+        "专门用于技术文章的人性化优化",
+        _TECHNICAL_HUMANIZATION_TEMPLATE,
+        ("content", "objective", "level_requirements", "platform", "detection_feedback"),
+        8
+    ),
+)
+
+
 class PromptManager:
     """Enhanced prompt management service for AI detection evasion."""
     
+    # Platforms with specific optimization requirements
+    PLATFORMS = ("toutiao", "weixin", "zhihu")
+    
+    # Rendered optimization prompts kept for repeated identical requests
+    PROMPT_CACHE_SIZE = 1024
+    PROMPT_CACHE_TTL = 600.0
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self._templates_cache = {}
+        self._templates_cache: Dict[str, _CachedTemplate] = {}
+        # Resolved template per (prompt type, optimization level, content type)
+        self._by_criteria: Dict[Tuple[PromptType, Optional[OptimizationLevel], Optional[ContentType]], _CachedTemplate] = {}
+        # Same keys, with the template's render function bound to its parts
+        self._template_renderers: Dict[Tuple, Tuple[_CachedTemplate, _TemplateRenderer]] = {}
+        self._prompt_cache: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        # Template reads and writes use separate connections so a save never
+        # queues behind (or holds up) a reload
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        # Specialized dynamic prompt renderers per (level, content_type, platform)
+        self._renderers: Dict[Tuple[OptimizationLevel, ContentType, str], _DynamicRenderer] = {}
+        self._precompute_renderers()
         self._load_templates()
     
+    def _precompute_renderers(self):
+        """Build the renderer for every known dynamic prompt combination."""
+        for level in OptimizationLevel:
+            for content_type in ContentType:
+                for platform in self.PLATFORMS:
+                    self._get_renderer(level, content_type, platform)
+    
+    def _get_renderer(
+        self,
+        level: OptimizationLevel,
+        content_type: ContentType,
+        platform: str
+    ) -> _DynamicRenderer:
+        """Get the specialized dynamic prompt renderer for a combination."""
+        key = (level, content_type, platform)
+        renderer = self._renderers.get(key)
+        if renderer is None:
+            role = self._get_role_definition(content_type)
+            requirements = self._get_optimization_requirements(level, content_type, platform)
+            requirements_block = "\n\n具体要求：\n" + "\n".join(
+                f"{i}. {req}" for i, req in enumerate(requirements, 1)
+            )
+            renderer = self._renderers[key] = _make_dynamic_renderer(
+                f"你是{role}。\n\n优化目标：",
+                self._get_optimization_objective(level, 1),
+                requirements_block
+            )
+        return renderer
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get the persistent template connection (call with _conn_lock held)."""
+        if self._conn is None:
+            self._conn = get_db_connection()
+            # Larger page cache so reloads after a save stay warm
+            self._conn.execute("PRAGMA cache_size=-64000")
+        return self._conn
+    
+    def _get_writer_connection(self) -> sqlite3.Connection:
+        """Get the persistent template writer connection (call with _writer_lock held)."""
+        if self._writer_conn is None:
+            self._writer_conn = get_db_connection()
+        return self._writer_conn
+    
+    def close(self):
+        """Close the persistent template connections."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        with self._writer_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+    
     def _load_templates(self):
         """Load prompt templates from database."""
         try:
-            # Use direct database connection for synchronous loading
-            from ..core.database import get_db_connection
-            conn = get_db_connection()
-            try:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM prompt_templates WHERE is_active = 1")
-                rows = cursor.fetchall()
-
-                for row in rows:
-                    key = f"{row['type']}_{row['name']}"
-                    # Create a simple template object
-                    template = type('PromptTemplate', (), {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'type': row['type'],
-                        'template': row['template'],
-                        'is_active': row['is_active']
-                    })()
-                    self._templates_cache[key] = template
-
-                self.logger.info(f"Loaded {len(rows)} prompt templates")
-            finally:
-                conn.close()
+            with self._conn_lock:
+                cursor = self._get_connection().cursor()
+                cursor.execute(
+                    "SELECT id, name, type, template, is_active FROM prompt_templates WHERE is_active = 1"
+                )
+                loaded = 0
+
+                while True:
+                    rows = cursor.fetchmany(_TEMPLATE_FETCH_SIZE)
+                    if not rows:
+                        break
+                    for template_id, name, template_type, text, is_active in rows:
+                        key = f"{template_type}_{name}"
+                        self._templates_cache[key] = _CachedTemplate(
+                            template_id, name, template_type, text, is_active, _parse_template(text)
+                        )
+                    loaded += len(rows)
+
+            self._index_templates()
+            # Rendered prompts may come from templates that just changed
+            self._prompt_cache.clear()
+            self.logger.info("Loaded %d prompt templates", loaded)
         except Exception as e:
             self.logger.error(f"Failed to load templates: {e}")
     
+    def _refresh_templates(self, names: List[str]):
+        """Re-read only the named templates into the cache, e.g. after a save."""
+        names = list(dict.fromkeys(names))
+        if not names:
+            return
+
+        placeholders = ", ".join("?" * len(names))
+        with self._conn_lock:
+            # Inactive rows first so an active row with the same key wins
+            rows = self._get_connection().execute(
+                "SELECT id, name, type, template, is_active FROM prompt_templates "
+                f"WHERE name IN ({placeholders}) ORDER BY is_active",
+                names
+            ).fetchall()
+
+        for template_id, name, template_type, text, is_active in rows:
+            key = f"{template_type}_{name}"
+            if is_active:
+                self._templates_cache[key] = _CachedTemplate(
+                    template_id, name, template_type, text, is_active, _parse_template(text)
+                )
+            else:
+                self._templates_cache.pop(key, None)
+
+        self._index_templates()
+        self._prompt_cache.clear()
+        self.logger.info("Refreshed %d prompt templates", len(rows))
+    
+    def _index_templates(self):
+        """Resolve the template for every criteria combination up front."""
+        by_criteria = {}
+        template_renderers = {}
+        renderers_by_id = {}
+        for key in product(PromptType, (None, *OptimizationLevel), (None, *ContentType)):
+            template = self._resolve_template(*key)
+            if template is not None:
+                by_criteria[key] = template
+                render = renderers_by_id.get(template.id)
+                if render is None:
+                    render = renderers_by_id[template.id] = partial(_render_parts, template.parts)
+                template_renderers[key] = (template, render)
+        self._by_criteria = by_criteria
+        self._template_renderers = template_renderers
+    
     def get_optimization_prompt(
         self,
         content: str,
@@ -88,35 +510,41 @@ class PromptManager:
             Optimized prompt string
         """
         # Determine optimization level
-        if ai_probability > 50:
-            level = OptimizationLevel.HEAVY
-        elif ai_probability > 25:
-            level = OptimizationLevel.STANDARD
-        else:
-            level = OptimizationLevel.LIGHT
-
-        self.logger.info(f"🎯 选择优化级别: {level.value} (AI概率: {ai_probability}%, 轮次: {round_number})")
+        level = self._level_for(ai_probability)
+
+        self.logger.info("🎯 选择优化级别: %s (AI概率: %s%%, 轮次: %s)", _LEVEL_STR[level], ai_probability, round_number)
+
+        # Retried rounds often resend unchanged text; reuse the rendered prompt
+        key = (
+            _LEVEL_STR[level],
+            round_number,
+            _CONTENT_TYPE_STR.get(content_type, content_type),
+            platform,
+            blake2b(content.encode('utf-8'), digest_size=16).digest(),
+            blake2b(detection_feedback.encode('utf-8'), digest_size=16).digest()
+        )
+        cached = self._prompt_cache.get(key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < self.PROMPT_CACHE_TTL:
+                self._prompt_cache.move_to_end(key)
+                self.logger.info("♻️ 命中提示词缓存，跳过重新构建")
+                return cached[1]
+            del self._prompt_cache[key]
 
         # Try to get prompt template from database first
-        template = self.get_template_by_criteria(
-            template_type=PromptType.OPTIMIZATION,
-            optimization_level=level,
-            content_type=content_type
-        )
+        resolved = self._template_renderers.get((PromptType.OPTIMIZATION, level, content_type))
 
-        if template:
-            self.logger.info(f"📚 使用数据库提示词模板: {template.name}")
+        if resolved:
+            template, render = resolved
+            self.logger.info("📚 使用数据库提示词模板: %s", template.name)
             # Use template from database and fill variables
-            prompt = self._fill_template_variables(
-                template=template,
-                variables={
-                    'content': content,
-                    'objective': self._get_optimization_objective(level, round_number),
-                    'level_requirements': self._get_level_requirements_text(level),
-                    'platform': platform,
-                    'detection_feedback': detection_feedback if detection_feedback else "无特殊反馈"
-                }
-            )
+            prompt = render({
+                'content': content,
+                'objective': self._get_optimization_objective(level, round_number),
+                'level_requirements': self._get_level_requirements_text(level),
+                'platform': platform,
+                'detection_feedback': detection_feedback if detection_feedback else "无特殊反馈"
+            })
         else:
             self.logger.info("📝 数据库中未找到合适模板，使用动态构建提示词")
             # Fallback to dynamic prompt building
@@ -129,8 +557,60 @@ class PromptManager:
                 platform=platform
             )
 
+        self._prompt_cache[key] = (time.monotonic(), prompt)
+        while len(self._prompt_cache) > self.PROMPT_CACHE_SIZE:
+            self._prompt_cache.popitem(last=False)
+
         return prompt
     
+    def get_optimization_prompts_batch(self, items: List[PromptSpec]) -> List[str]:
+        """
+        Get optimization prompts for many articles at once.
+
+        Items sharing (level, content_type, platform) resolve their template
+        once and log once per group; results keep the order of ``items``.
+        """
+        groups: Dict[Tuple[OptimizationLevel, ContentType, str], List[Tuple[int, PromptSpec]]] = defaultdict(list)
+        for index, spec in enumerate(items):
+            level = self._level_for(spec.ai_probability)
+            groups[(level, spec.content_type, spec.platform)].append((index, spec))
+
+        results: List[Optional[str]] = [None] * len(items)
+        for (level, content_type, platform), group in groups.items():
+            resolved = self._template_renderers.get((PromptType.OPTIMIZATION, level, content_type))
+
+            if resolved:
+                template, render = resolved
+                self.logger.info(
+                    "📚 批量使用数据库提示词模板: %s (级别: %s, 平台: %s, 共 %d 篇)",
+                    template.name, _LEVEL_STR[level], platform, len(group)
+                )
+                level_requirements = self._get_level_requirements_text(level)
+                for index, spec in group:
+                    results[index] = render({
+                        'content': spec.content,
+                        'objective': self._get_optimization_objective(level, spec.round_number),
+                        'level_requirements': level_requirements,
+                        'platform': platform,
+                        'detection_feedback': spec.detection_feedback if spec.detection_feedback else "无特殊反馈"
+                    })
+            else:
+                self.logger.info(
+                    "📝 批量动态构建提示词 (级别: %s, 平台: %s, 共 %d 篇)",
+                    _LEVEL_STR[level], platform, len(group)
+                )
+                renderer = self._get_renderer(level, content_type, platform)
+                for index, spec in group:
+                    results[index] = renderer(spec.content, spec.round_number, spec.detection_feedback)
+
+        return results
+
+    @staticmethod
+    def _level_for(ai_probability: float) -> OptimizationLevel:
+        """Map an AI detection probability to an optimization level."""
+        # bisect_left keeps exact threshold values in the lower level
+        return _LEVELS_BY_BUCKET[bisect_left(_LEVEL_THRESHOLDS, ai_probability)]
+    
     def _build_dynamic_prompt(
         self,
         content: str,
@@ -141,42 +621,8 @@ class PromptManager:
         platform: str
     ) -> str:
         """Build dynamic prompt based on parameters."""
-        
-        # Base role and objective
-        role = self._get_role_definition(content_type)
-        objective = self._get_optimization_objective(level, round_number)
-        requirements = self._get_optimization_requirements(level, content_type, platform)
-        
-        # Build prompt
-        prompt_parts = [
-            f"你是{role}。",
-            "",
-            f"优化目标：{objective}",
-            "",
-            "具体要求：",
-        ]
-        
-        # Add requirements
-        for i, req in enumerate(requirements, 1):
-            prompt_parts.append(f"{i}. {req}")
-        
-        # Add detection feedback if available
-        if detection_feedback:
-            prompt_parts.extend([
-                "",
-                f"检测反馈：{detection_feedback}",
-            ])
-        
-        # Add content and output instruction
-        prompt_parts.extend([
-            "",
-            "原文内容：",
-            content,
-            "",
-            "请直接输出优化后的内容，不要添加任何解释或说明。"
-        ])
-        
-        return "\n".join(prompt_parts)
+        renderer = self._get_renderer(level, content_type, platform)
+        return renderer(content, round_number, detection_feedback)
     
     def _get_role_definition(self, content_type: ContentType) -> str:
         """Get role definition based on content type."""
@@ -190,16 +636,10 @@ class PromptManager:
     
     def _get_optimization_objective(self, level: OptimizationLevel, round_number: int) -> str:
         """Get optimization objective based on level and round."""
-        base_objectives = {
-            OptimizationLevel.LIGHT: "对内容进行轻度优化，提升自然度和可读性",
-            OptimizationLevel.STANDARD: "对内容进行中度改写，显著降低AI痕迹",
-            OptimizationLevel.HEAVY: "对内容进行深度重构，彻底消除AI生成特征"
-        }
-        
-        base = base_objectives[level]
+        base = _BASE_OBJECTIVES[level]
         
         if round_number > 1:
-            base += f"（第{round_number}轮优化，需要更加彻底的改写）"
+            base += _ROUND_NOTE.format(round_number)
         
         return base
 
@@ -208,86 +648,18 @@ class PromptManager:
         level: OptimizationLevel,
         content_type: ContentType,
         platform: str
-    ) -> List[str]:
+    ) -> Tuple[str, ...]:
         """Get optimization requirements based on level, content type and platform."""
-
-        # Base requirements for all levels
-        base_requirements = [
-            "保持原文的核心观点和关键信息完整性",
-            "确保内容的逻辑结构清晰合理"
-        ]
-
-        # Level-specific requirements
-        level_requirements = {
-            OptimizationLevel.LIGHT: [
-                "调整部分句式结构，增加表达的自然性",
-                "适当添加一些个人化的表达方式",
-                "保持原文的整体风格和语调"
-            ],
-            OptimizationLevel.STANDARD: [
-                "显著改变句式结构和表达方式",
-                "增加更多个人化的见解和评论",
-                "调整段落组织，使其更符合人类写作习惯",
-                "添加适当的口语化表达和语气词"
-            ],
-            OptimizationLevel.HEAVY: [
-                "彻底重构文章的表达方式和语言风格",
-                "大量增加个人化的观点、经验和感受",
-                "完全改变句式模式，避免AI写作的规整性",
-                "添加丰富的情感色彩和主观判断",
-                "模拟真实的人类思维过程和表达习惯",
-                "增加不规则的语言特征和个性化表达"
-            ]
-        }
-
-        # Content type specific requirements
-        content_requirements = {
-            ContentType.TECHNICAL: [
-                "保持技术术语的准确性和专业性",
-                "添加个人的技术见解和实践经验",
-                "适当分享相关的技术背景和应用场景"
-            ],
-            ContentType.NEWS: [
-                "增加新闻评论和个人观点",
-                "添加对事件的分析和预测",
-                "融入时事背景和相关联想"
-            ],
-            ContentType.TUTORIAL: [
-                "增加个人的学习心得和实践建议",
-                "添加常见问题和解决方案的分享",
-                "融入教学经验和学习技巧"
-            ],
-            ContentType.GENERAL: [
-                "增加个人的生活感悟和经验分享",
-                "添加相关的联想和思考过程"
-            ]
-        }
-
-        # Platform specific requirements
-        platform_requirements = {
-            "toutiao": [
-                "标题要有吸引力，内容要有话题性",
-                "适合大众阅读，语言通俗易懂",
-                "增加互动性和争议性元素"
-            ],
-            "weixin": [
-                "内容要有价值，适合分享传播",
-                "语言要精准，逻辑要清晰",
-                "增加实用性和可操作性"
-            ],
-            "zhihu": [
-                "内容要专业深入，有知识价值",
-                "逻辑要严密，论证要充分",
-                "增加专业性和权威性"
-            ]
-        }
-
-        # Combine all requirements
-        requirements = base_requirements.copy()
-        requirements.extend(level_requirements.get(level, []))
-        requirements.extend(content_requirements.get(content_type, []))
-        requirements.extend(platform_requirements.get(platform, []))
-
+        key = (level, content_type, platform)
+        requirements = _REQUIREMENTS_CACHE.get(key)
+        if requirements is None:
+            requirements = (
+                _BASE_REQUIREMENTS
+                + _LEVEL_REQUIREMENTS.get(level, ())
+                + _CONTENT_REQUIREMENTS.get(content_type, ())
+                + _PLATFORM_REQUIREMENTS.get(platform, ())
+            )
+            _REQUIREMENTS_CACHE[key] = requirements
         return requirements
 
     def get_translation_prompt(
@@ -299,168 +671,87 @@ class PromptManager:
         title: str = ""
     ) -> str:
         """Get translation prompt with humanization features."""
-
-        role = self._get_role_definition(content_type)
-
-        # Language mapping
-        lang_names = {
-            "en": "英文",
-            "zh": "中文",
-            "ja": "日文",
-            "ko": "韩文"
-        }
-
-        source_name = lang_names.get(source_lang, source_lang)
-        target_name = lang_names.get(target_lang, target_lang)
-
-        prompt_parts = [
-            f"你是{role}，同时也是一位专业的翻译专家。",
-            "",
-            f"请将以下{source_name}内容翻译成{target_name}，要求：",
-            "",
-            "1. 保持原文的核心观点和信息完整性",
-            "2. 使用自然流畅的中文表达，避免翻译腔",
-            "3. 适当调整句式以符合中文阅读习惯",
-            "4. 保留专业术语的准确性",
-            "5. 增加适当的本土化表达，使其更符合中文语境",
-            "6. 保持段落结构，但可以适当调整句子组织",
-            ""
-        ]
-
-        if title:
-            prompt_parts.extend([
-                f"文章标题：{title}",
-                ""
-            ])
-
-        prompt_parts.extend([
-            "原文内容：",
-            content,
-            "",
-            "请直接输出翻译结果，不要添加任何解释或说明。"
-        ])
-
-        return "\n".join(prompt_parts)
+        return _TRANSLATION_TEMPLATE.format(
+            role=self._get_role_definition(content_type),
+            source_name=_LANGUAGE_NAMES.get(source_lang, source_lang),
+            target_name=_LANGUAGE_NAMES.get(target_lang, target_lang),
+            title_block=f"文章标题：{title}\n\n" if title else "",
+            content=content
+        )
 
     def create_enhanced_templates(self) -> List[PromptTemplate]:
         """Create enhanced prompt templates for AI detection evasion."""
 
         templates = []
-
-        # Basic optimization template
-        basic_optimization = PromptTemplate()
-        basic_optimization.name = "basic_humanization_v2"
-        basic_optimization.display_name = "基础人性化优化模板 v2.0"
-        basic_optimization.description = "基础的内容人性化优化，适用于轻度AI痕迹降低"
-        basic_optimization.template = """你是一位专业的内容创作专家，具有多年的写作和编辑经验。
-
-优化目标：对内容进行轻度优化，提升自然度和可读性
-
-具体要求：
-1. 保持原文的核心观点和关键信息完整性
-2. 确保内容的逻辑结构清晰合理
-3. 调整部分句式结构，增加表达的自然性
-4. 适当添加一些个人化的表达方式
-5. 保持原文的整体风格和语调
-
-原文内容：
-{content}
-
-请直接输出优化后的内容，不要添加任何解释或说明。"""
-        basic_optimization.type = PromptType.OPTIMIZATION
-        basic_optimization.variables = ["content"]
-        basic_optimization.is_active = True
-        basic_optimization.priority = 5
-        templates.append(basic_optimization)
-
-        # AI trace reduction template
-        ai_reduction = PromptTemplate()
-        ai_reduction.name = "ai_trace_reduction_v2"
-        ai_reduction.display_name = "AI痕迹深度降低模板 v2.0"
-        ai_reduction.description = "专门用于降低AI检测浓度的深度优化模板"
-        ai_reduction.template = """你是一位资深的内容创作者，具有丰富的写作经验和深厚的行业背景。
-
-优化目标：对内容进行深度重构，彻底消除AI生成特征
-
-具体要求：
-1. 保持原文的核心观点和关键信息完整性
-2. 彻底重构文章的表达方式和语言风格
-3. 大量增加个人化的观点、经验和感受
-4. 完全改变句式模式，避免AI写作的规整性
-5. 添加丰富的情感色彩和主观判断
-6. 模拟真实的人类思维过程和表达习惯
-7. 增加不规则的语言特征和个性化表达
-8. 适当添加口语化表达和语气词
-
-{detection_feedback}
-
-原文内容：
-{content}
-
-请直接输出优化后的内容，不要添加任何解释或说明。"""
-        ai_reduction.type = PromptType.OPTIMIZATION
-        ai_reduction.variables = ["content", "detection_feedback"]
-        ai_reduction.is_active = True
-        ai_reduction.priority = 10
-        templates.append(ai_reduction)
-
-        # Technical content optimization
-        technical_optimization = PromptTemplate()
-        technical_optimization.name = "technical_humanization_v2"
-        technical_optimization.display_name = "技术内容人性化模板 v2.0"
-        technical_optimization.description = "专门用于技术文章的人性化优化"
-        technical_optimization.template = """你是一位资深的技术内容创作者，具有丰富的技术写作经验和深厚的行业背景。
-
-优化目标：{objective}
-
-具体要求：
-1. 保持原文的核心观点和关键信息完整性
-2. 保持技术术语的准确性和专业性
-3. 添加个人的技术见解和实践经验
-4. 适当分享相关的技术背景和应用场景
-5. {level_requirements}
-6. 确保内容适合{platform}平台发布
-
-{detection_feedback}
-
-原文内容：
-{content}
-
-请直接输出优化后的内容，不要添加任何解释或说明。"""
-        technical_optimization.type = PromptType.OPTIMIZATION
-        technical_optimization.variables = ["content", "objective", "level_requirements", "platform", "detection_feedback"]
-        technical_optimization.is_active = True
-        technical_optimization.priority = 8
-        templates.append(technical_optimization)
+        for name, display_name, description, text, variables, priority in _ENHANCED_TEMPLATES:
+            template = PromptTemplate()
+            template.name = name
+            template.display_name = display_name
+            template.description = description
+            template.template = text
+            template.type = PromptType.OPTIMIZATION
+            # Fresh list per object; the ORM column is mutable JSON
+            template.variables = list(variables)
+            template.is_active = True
+            template.priority = priority
+            templates.append(template)
 
         return templates
 
     def save_templates_to_db(self, templates: List[PromptTemplate]):
         """Save templates to database."""
         try:
-            with get_db_session() as session:
-                for template in templates:
-                    # Check if template already exists
-                    existing = session.query(PromptTemplate).filter(
-                        PromptTemplate.name == template.name
-                    ).first()
-
-                    if existing:
-                        # Update existing template
-                        for attr in ['display_name', 'description', 'template', 'variables', 'priority']:
-                            setattr(existing, attr, getattr(template, attr))
-                        existing.updated_at = datetime.utcnow()
-                        self.logger.info(f"Updated template: {template.name}")
-                    else:
-                        # Add new template
-                        session.add(template)
-                        self.logger.info(f"Added new template: {template.name}")
-
-                session.commit()
-                self.logger.info(f"Successfully saved {len(templates)} templates")
-
-                # Reload cache
-                self._load_templates()
+            with self._writer_lock:
+                conn = self._get_writer_connection()
+                # The connection autocommits; take the write lock up front for the batch
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for template in templates:
+                        variables = json.dumps(template.variables, ensure_ascii=False) \
+                            if template.variables is not None else None
+
+                        # Check if template already exists
+                        existing = conn.execute(
+                            "SELECT id FROM prompt_templates WHERE name = ? LIMIT 1",
+                            (template.name,)
+                        ).fetchone()
+
+                        if existing:
+                            # Update existing template
+                            conn.execute("""
+                                UPDATE prompt_templates
+                                SET display_name = ?, description = ?, template = ?,
+                                    variables = ?, priority = ?, updated_at = CURRENT_TIMESTAMP
+                                WHERE id = ?
+                            """, (
+                                template.display_name, template.description, template.template,
+                                variables, template.priority, existing[0]
+                            ))
+                            self.logger.info("Updated template: %s", template.name)
+                        else:
+                            # Add new template
+                            conn.execute("""
+                                INSERT INTO prompt_templates (
+                                    name, display_name, description, type, template,
+                                    variables, is_active, priority
+                                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                            """, (
+                                template.name, template.display_name, template.description,
+                                getattr(template.type, 'value', template.type), template.template,
+                                variables, 1 if template.is_active is None else int(template.is_active),
+                                template.priority or 0
+                            ))
+                            self.logger.info("Added new template: %s", template.name)
+
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+            self.logger.info("Successfully saved %d templates", len(templates))
+
+            # Refresh only the saved templates in the cache
+            self._refresh_templates([template.name for template in templates])
 
         except Exception as e:
             self.logger.error(f"Failed to save templates: {e}")
@@ -473,23 +764,27 @@ class PromptManager:
         content_type: ContentType = None
     ) -> Optional[PromptTemplate]:
         """Get template by specific criteria."""
+        return self._by_criteria.get((template_type, optimization_level, content_type))
 
-        # Define template selection logic
-        template_mapping = {
-            (PromptType.OPTIMIZATION, OptimizationLevel.LIGHT): "basic_humanization_v2",
-            (PromptType.OPTIMIZATION, OptimizationLevel.STANDARD): "ai_trace_reduction_v2",
-            (PromptType.OPTIMIZATION, OptimizationLevel.HEAVY): "ai_trace_reduction_v2",
-        }
+    def _resolve_template(
+        self,
+        template_type: PromptType,
+        optimization_level: Optional[OptimizationLevel],
+        content_type: Optional[ContentType]
+    ) -> Optional[_CachedTemplate]:
+        """Apply the template selection rules against the loaded templates."""
 
         # Special handling for technical content
         if content_type == ContentType.TECHNICAL:
             template_name = "technical_humanization_v2"
         else:
-            key = (template_type, optimization_level)
-            template_name = template_mapping.get(key)
+            key = (_PROMPT_TYPE_STR.get(template_type), _LEVEL_STR.get(optimization_level))
+            template_name = _TEMPLATE_NAMES.get(key)
 
         if template_name:
-            template_key = f"{template_type}_{template_name}"
+            # Cache keys use the stored type string; formatting the enum itself
+            # gives "PromptType.OPTIMIZATION" on Python 3.11+
+            template_key = f"{_PROMPT_TYPE_STR[template_type]}_{template_name}"
             return self._templates_cache.get(template_key)
 
         return None
@@ -497,15 +792,11 @@ class PromptManager:
     def _fill_template_variables(self, template, variables: Dict[str, str]) -> str:
         """Fill template variables with provided values."""
         try:
-            # Get template content
-            template_content = template.template
-
-            # Replace variables in template
-            for var_name, var_value in variables.items():
-                placeholder = f"{{{var_name}}}"
-                template_content = template_content.replace(placeholder, str(var_value))
+            # Substitute placeholders in a single pass over the pre-split template
+            parts = getattr(template, 'parts', None) or _parse_template(template.template)
+            template_content = _render_parts(parts, variables)
 
-            self.logger.info(f"✅ 模板变量填充完成，共替换 {len(variables)} 个变量")
+            self.logger.info("✅ 模板变量填充完成，共替换 %d 个变量", len(variables))
             return template_content
 
         except Exception as e:
@@ -515,38 +806,18 @@ class PromptManager:
 
     def _get_level_requirements_text(self, level: OptimizationLevel) -> str:
         """Get level requirements as formatted text."""
-        level_requirements = {
-            OptimizationLevel.LIGHT: [
-                "调整部分句式结构，增加表达的自然性",
-                "适当添加一些个人化的表达方式",
-                "保持原文的整体风格和语调"
-            ],
-            OptimizationLevel.STANDARD: [
-                "显著改变句式结构和表达方式",
-                "增加更多个人化的见解和评论",
-                "调整段落组织，使其更符合人类写作习惯",
-                "添加适当的口语化表达和语气词"
-            ],
-            OptimizationLevel.HEAVY: [
-                "彻底重构文章的表达方式和语言风格",
-                "大量增加个人化的观点、经验和感受",
-                "完全改变句式模式，避免AI写作的规整性",
-                "添加丰富的情感色彩和主观判断",
-                "模拟真实的人类思维过程和表达习惯",
-                "增加不规则的语言特征和个性化表达"
-            ]
-        }
-
-        requirements = level_requirements.get(level, [])
-        return "; ".join(requirements)
+        return _LEVEL_REQ_TEXT.get(level, "")
 
 
 # Service instance
 _prompt_manager = None
+_prompt_manager_lock = threading.Lock()
 
 def get_prompt_manager() -> PromptManager:
-    """Get prompt manager instance."""
+    """Get prompt manager instance (thread-safe)."""
     global _prompt_manager
     if _prompt_manager is None:
-        _prompt_manager = PromptManager()
+        with _prompt_manager_lock:
+            if _prompt_manager is None:
+                _prompt_manager = PromptManager()
     return _prompt_manager